@@ -0,0 +1,115 @@
+import asyncio
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# /chat throughput with concurrent sessions against a stubbed LLM:
+#   python benchmark_chat.py [llm latency ms] [concurrency levels...]     (default: 200 ms, 1 4 16 64)
+# Every session runs the same three turns (greeting, search, reply). "async"
+# is the stub awaiting its latency like ainvoke does; "blocking" sleeps on the
+# event loop, which is what the old synchronous llm.invoke did to every session.
+# Retrieval uses the configured EMBEDDING_PROVIDER on an index built for the
+# run from a copy of events.db with every event moved into the coming weeks,
+# so the search turn always has upcoming events to show (and fails loudly if not).
+
+os.environ.setdefault("SESSION_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("WARM_UP", "0")
+
+import httpx
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+import event_store
+import ingest
+import main
+import rag_logic
+
+TURNS = ["hi there", "techno tonight please", "hmm let me think"]
+SEARCH_TURN = 1
+
+
+class StubLLM:
+    """
+    Answers like the persona would, after a fixed delay, without a network call.
+    """
+
+    def __init__(self, latency, blocking=False):
+        self.latency = latency
+        self.blocking = blocking
+
+    def _reply(self, messages):
+        last = messages[-1]
+        if isinstance(last, SystemMessage) and last.content.startswith("SYSTEM:"):
+            return "Here you go! Thoughts?"
+        # Reply prompts end with the persona reminder; what the user said is the last HumanMessage
+        said = next(m.content for m in reversed(messages) if isinstance(m, HumanMessage))
+        if "techno" in said:
+            return "The Bass Head! SEARCH_ACTION: techno party"
+        return "What's your vibe tonight?"
+
+    async def ainvoke(self, messages):
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+        return AIMessage(content=self._reply(messages))
+
+
+async def run_session(client, session_id, latencies):
+    for turn, message in enumerate(TURNS):
+        start = time.perf_counter()
+        response = await client.post("/chat", json={"message": message, "session_id": session_id})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        # A search turn that found nothing skipped retrieval and the follow-up call; its time means nothing
+        if turn == SEARCH_TURN and not response.json()["events"]:
+            raise RuntimeError(f"Search turn returned no events for {session_id}; is the index built and upcoming?")
+
+async def run_level(concurrency, label):
+    transport = httpx.ASGITransport(app=main.app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(run_session(client, f"{label}-{concurrency}-{i}", latencies) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+    return len(latencies) / elapsed, statistics.median(latencies), p99
+
+def build_upcoming_index(workdir):
+    """
+    Copies events.db and the profiles into workdir, shifts the events so the
+    first one is tomorrow, indexes them there and makes workdir the cwd.
+    """
+    shutil.copy(event_store.EVENTS_DB, workdir)
+    shutil.copytree(ingest.DATA_PATH, os.path.join(workdir, "data_raw"))
+    os.chdir(workdir)
+    conn = event_store.connect()
+    event_store.import_text_dump(conn)
+    first = conn.execute("SELECT MIN(date_ts) FROM events WHERE date_ts > 0").fetchone()[0]
+    with conn:
+        conn.execute("UPDATE events SET date_ts = date_ts + ? WHERE date_ts > 0", (int(time.time()) + 86400 - first,))
+    conn.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingest.ingest_data()
+
+async def benchmark(latency, levels):
+    rag_logic.warm_up()
+    for label, blocking in [("async", False), ("blocking", True)]:
+        rag_logic.set_services(llm=StubLLM(latency, blocking))
+        print(f"   {label}")
+        for concurrency in levels:
+            throughput, p50, p99 = await run_level(concurrency, label)
+            print(f"      {concurrency:>4} sessions   {throughput:7.1f} turns/s   p50 {1000 * p50:7.0f} ms   p99 {1000 * p99:7.0f} ms")
+
+if __name__ == "__main__":
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 200
+    levels = [int(a) for a in sys.argv[2:]] or [1, 4, 16, 64]
+    print(f"⏱️  /chat, {len(TURNS)} turns per session, stub LLM latency {latency_ms:.0f} ms")
+    with tempfile.TemporaryDirectory() as workdir:
+        build_upcoming_index(workdir)
+        asyncio.run(benchmark(latency_ms / 1000, levels))
@@ -0,0 +1,46 @@
+import sys
+import time
+import numpy as np
+from digest import DIGEST_TOP_N, DIGEST_USER_BATCH, normalize_rows, select_for_users
+from email_service import render_digest_email, render_event_card
+
+# Digest scoring + selection + rendering at scale on synthetic vectors:
+#   python benchmark_digest.py [users] [events]      (default: 100000 users x 10000 events)
+# Profile embedding and the outbox insert are left out: the first depends on the
+# provider (see benchmark_embeddings.py), the second is one executemany per batch.
+
+DIMENSIONS = 1536
+
+
+def benchmark(user_count, event_count, top_n=DIGEST_TOP_N):
+    rng = np.random.default_rng(11)
+    event_vectors = normalize_rows(rng.standard_normal((event_count, DIMENSIONS), dtype=np.float32))
+    cards = [render_event_card({
+        "title": f"Event {i}", "date": "2025-12-06 20:00", "location": "Bucharest",
+        "cost": "50 RON", "description": "Synthetic event.", "url": f"https://example.com/{i}",
+    }) for i in range(event_count)]
+
+    scoring = rendering = 0.0
+    for start in range(0, user_count, DIGEST_USER_BATCH):
+        size = min(DIGEST_USER_BATCH, user_count - start)
+        user_vectors = normalize_rows(rng.standard_normal((size, DIMENSIONS), dtype=np.float32))
+
+        t0 = time.perf_counter()
+        picks = select_for_users(user_vectors, event_vectors, top_n)
+        t1 = time.perf_counter()
+        for row in picks:
+            render_digest_email("Friend", [cards[i] for i in row])
+        t2 = time.perf_counter()
+
+        scoring += t1 - t0
+        rendering += t2 - t1
+    return scoring, rendering
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    print(f"⏱️  {users} users x {events} events, {DIMENSIONS}-dim, top {DIGEST_TOP_N}, batches of {DIGEST_USER_BATCH}")
+    scoring, rendering = benchmark(users, events)
+    print(f"   scoring + MMR  {scoring:7.1f}s   ({1e6 * scoring / users:.0f} µs/user)")
+    print(f"   rendering      {rendering:7.1f}s   ({1e6 * rendering / users:.0f} µs/user)")
+    print(f"   total          {scoring + rendering:7.1f}s")
@@ -0,0 +1,70 @@
+import statistics
+import sys
+import time
+from dotenv import load_dotenv
+import event_store
+from embedding_providers import create_embeddings, spec_name
+
+# Compares embedding providers on the real event texts:
+#   python benchmark_embeddings.py [provider ...]     (default: hashing local openai)
+# Ingest throughput = docs/second through embed_documents in EMBED_BATCH-sized calls;
+# query latency = embed_query on short chat-style queries, first call excluded (model load).
+
+load_dotenv(dotenv_path="./.env")
+
+EMBED_BATCH = 500
+SAMPLE_QUERIES = [
+    "techno party this weekend",
+    "teatru pentru copii",
+    "jazz concert in centru",
+    "free museum exhibition",
+    "stand-up comedy sub 100 lei",
+    "rooftop networking",
+    "board games night",
+    "concert rock underground",
+]
+
+
+def load_texts():
+    conn = event_store.connect()
+    event_store.import_text_dump(conn)
+    rows = conn.execute("SELECT * FROM events WHERE canonical_id IS NULL").fetchall()
+    conn.close()
+    return [event_store.render_event_text(row) for row in rows]
+
+def benchmark(provider, texts, query_rounds=5):
+    embeddings, spec = create_embeddings(provider)
+    embeddings.embed_query("warm up")
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), EMBED_BATCH):
+        embeddings.embed_documents(texts[i:i + EMBED_BATCH])
+    ingest_seconds = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(query_rounds):
+        for query in SAMPLE_QUERIES:
+            start = time.perf_counter()
+            embeddings.embed_query(query)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    return {
+        "provider": spec_name(spec),
+        "docs_per_second": round(len(texts) / ingest_seconds, 1) if ingest_seconds else float("inf"),
+        "query_p50_ms": round(1000 * statistics.median(latencies), 2),
+        "query_p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2),
+    }
+
+if __name__ == "__main__":
+    providers = sys.argv[1:] or ["hashing", "local", "openai"]
+    texts = load_texts()
+    print(f"⏱️  Benchmarking {len(texts)} event documents, {len(SAMPLE_QUERIES)} queries")
+    for provider in providers:
+        try:
+            result = benchmark(provider, texts)
+        except Exception as e:
+            print(f"   ❌ {provider}: {e}")
+            continue
+        print(f"   {result['provider']:<50} {result['docs_per_second']:>10} docs/s   "
+              f"p50 {result['query_p50_ms']} ms   p95 {result['query_p95_ms']} ms")
@@ -0,0 +1,84 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+import scrape
+from extractors import run_extractors
+
+# Rule extractors vs the LLM-only path on the saved listings in data_eval/pages:
+#   python benchmark_extractors.py [stub LLM latency s]          (default 3.0)
+# Each page goes through what scrape_site does after the fetch: the extractors
+# first, then preprocess_html + chunking + one extraction call per chunk when
+# none matches. The LLM-only path skips the extractors. Model calls go to a stub
+# that waits the given latency (gpt-4o-mini on a 12k-character chunk takes a
+# few seconds); the LLM path is credited with every event on the page, its best case.
+
+PAGES = [
+    # (file, the listing URL it was saved from, events on the page)
+    ("iabilet_bucuresti.html", "https://www.iabilet.ro/bilete-in-bucuresti/", 8),
+    ("zilesinopti_bucuresti.html", "https://zilesinopti.ro/evenimente-bucuresti/", 6),
+    ("berariah.html", "https://berariah.ro/", 6),
+]
+PAGES_DIR = os.path.join("data_eval", "pages")
+REPEATS = 50
+
+
+class StubCompletions:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def create(self, messages, **kwargs):
+        time.sleep(self.latency)
+        self.calls += 1
+        message = SimpleNamespace(content=json.dumps({"events": []}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def llm_path(html, url):
+    with contextlib.redirect_stdout(io.StringIO()):
+        text = scrape.preprocess_html(html, url)
+    chunks = scrape.chunk_page_text(text)[:scrape.MAX_CHUNKS_PER_PAGE]
+    scrape.merge_events(scrape.extract_structured_data(chunk).get("events", []) for chunk in chunks)
+
+def extractor_first(html, url):
+    _, events = run_extractors(html, url)
+    if not events:
+        llm_path(html, url)
+
+def time_page(path_fn, html, url, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        path_fn(html, url)
+    return (time.perf_counter() - start) / repeats
+
+if __name__ == "__main__":
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    completions = StubCompletions(latency)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    scrape.get_openai_client = lambda: client
+
+    print(f"⏱️  Saved listings, stub LLM latency {latency:.1f} s")
+    totals = {"extractors": [0.0, 0], "llm only": [0.0, 0]}
+    for name, url, event_count in PAGES:
+        with open(os.path.join(PAGES_DIR, name), "rb") as f:
+            html = f.read()
+        extractor, _ = run_extractors(html, url)
+        print(f"   {name}  ({extractor or 'no extractor, LLM fallback'})")
+        for label, path_fn in [("extractors", extractor_first), ("llm only", llm_path)]:
+            # Paths that call the model are timed once; the latency dominates anyway
+            completions.calls = 0
+            repeats = REPEATS if label == "extractors" and extractor else 1
+            seconds = time_page(path_fn, html, url, repeats)
+            calls = completions.calls // repeats
+            totals[label][0] += seconds
+            totals[label][1] += calls
+            print(f"      {label:<10} {1000 * seconds:9.1f} ms/page   {event_count / seconds:9.0f} events/s   {calls} LLM calls")
+
+    events = sum(count for _, _, count in PAGES)
+    print(f"   one run over all {len(PAGES)} pages ({events} events)")
+    for label, (seconds, calls) in totals.items():
+        print(f"      {label:<10} {seconds:9.2f} s   {events / seconds:9.1f} events/s   {calls} LLM calls")
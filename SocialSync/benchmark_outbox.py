@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Outbox throughput against a local SMTP stand-in (needs aiosmtpd):
+#   python benchmark_outbox.py [messages] [pool sizes...]     (default: 500 messages, pools 1 2 4)
+# Compares the old one-connection-per-email path with the pooled, batched sender.
+
+os.environ.setdefault("SMTP_SERVER", "127.0.0.1")
+os.environ.setdefault("SMTP_PORT", "8025")
+os.environ.setdefault("SMTP_STARTTLS", "0")
+
+from aiosmtpd.controller import Controller
+from email_service import SMTP_PORT, SMTP_SERVER, render_event_email, send_event_email
+from email_outbox import EmailOutbox, OutboxSender, SMTPPool
+
+SAMPLE_EVENT = {
+    "title": "Jazzy Saturday", "date": "2025-12-06 20:00", "location": "Berăria H",
+    "cost": "Free / Check Link", "description": "Live jazz trio.", "url": "https://example.com/jazz",
+}
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+async def drain(outbox, pool_size, total):
+    sender = OutboxSender(outbox, SMTPPool(size=pool_size), workers=pool_size, poll_interval=0.05)
+    sender.start()
+    while outbox.counts().get("sent", 0) < total:
+        await asyncio.sleep(0.05)
+    await sender.stop()
+
+def benchmark(total, pool_sizes):
+    handler = CountingHandler()
+    controller = Controller(handler, hostname=SMTP_SERVER, port=SMTP_PORT)
+    controller.start()
+    subject, html = render_event_email(SAMPLE_EVENT)
+    try:
+        direct = min(total, 100)
+        start = time.perf_counter()
+        for i in range(direct):
+            send_event_email(f"user{i}@example.com", SAMPLE_EVENT)
+        rate = direct / (time.perf_counter() - start)
+        print(f"   one connection per email      {rate:8.1f} emails/s  ({direct} sent)")
+
+        for pool_size in pool_sizes:
+            with tempfile.TemporaryDirectory() as workdir:
+                outbox = EmailOutbox(os.path.join(workdir, "outbox.db"))
+                outbox.enqueue_many((f"user{i}@example.com", subject, html) for i in range(total))
+                start = time.perf_counter()
+                asyncio.run(drain(outbox, pool_size, total))
+                rate = total / (time.perf_counter() - start)
+                print(f"   outbox, pool of {pool_size:<2} connections {rate:8.1f} emails/s  ({total} sent)")
+    finally:
+        controller.stop()
+    print(f"   stand-in received {handler.received} messages")
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    pools = [int(p) for p in sys.argv[2:]] or [1, 2, 4]
+    print(f"⏱️  SMTP stand-in on {SMTP_SERVER}:{SMTP_PORT}")
+    benchmark(total, pools)
@@ -0,0 +1,123 @@
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import scrape
+
+# Scrape pipeline wall time against local fixture sites and a stubbed OpenAI client:
+#   python benchmark_scrape.py [site counts...]          (default: 10 50 200)
+# Runs scrape.run_ingestion_process end to end (fetch, preprocess, extraction,
+# one writer, dedup) into a temporary events.db. "serial" is one site and one
+# extraction call at a time, like the old loop; "pipelined" uses the
+# SITE_WORKERS / EXTRACT_WORKERS / PER_HOST_LIMIT settings from scrape.py.
+# Sites are spread over HOSTS local servers (one port each, so the per-host
+# limit applies as it would to real domains). Every page lists EVENTS_PER_PAGE
+# events in plain markup, so no rule extractor matches and each page costs one
+# model call.
+
+HOSTS = 16
+EVENTS_PER_PAGE = 10
+PAGE_LATENCY = 0.05
+LLM_LATENCY = 0.3
+SERIAL_LIMIT = 200   # serial runs grow linearly; beyond this they only take time
+
+
+def listing_page(path):
+    items = "\n".join(
+        f'<div class="col"><a href="{path}/ev{i}"><h4>Night {i} at {path.strip("/")}</h4></a>'
+        f"<p>06.12 · ora 2{i % 4}:00</p><p>Live set, intrare {20 + i} lei.</p></div>"
+        for i in range(EVENTS_PER_PAGE)
+    )
+    return f"<html><head><title>Program</title></head><body><section>{items}</section></body></html>".encode()
+
+
+class FixtureSite(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(PAGE_LATENCY)
+        body = listing_page(self.path)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubCompletions:
+    """
+    chat.completions.create with a fixed delay: one event per injected [URL: ...] link.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def create(self, messages, **kwargs):
+        time.sleep(LLM_LATENCY)
+        with self.lock:
+            self.calls += 1
+        text = messages[-1]["content"]
+        events = [{
+            "name": name, "price": 20, "date": "2025-12-06 21:00", "location": "Fixture Hall",
+            "category": "Concert", "description": "Live set.", "event_url": link,
+        } for name, link in re.findall(r"(Night \d+ at \S+) \[URL: (\S+)\]", text)]
+        message = SimpleNamespace(content=json.dumps({"events": events}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def start_sites():
+    servers = []
+    for _ in range(HOSTS):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureSite)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+def run(urls, site_workers, extract_workers, workdir):
+    completions = StubCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    scrape.get_openai_client = lambda: client
+    scrape.urls_to_process = urls
+    scrape.DB_NAME = os.path.join(workdir, f"events-{site_workers}-{len(urls)}.db")
+    scrape.USE_PAGE_CACHE = False
+    scrape.SITE_WORKERS, scrape.EXTRACT_WORKERS = site_workers, extract_workers
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scrape.run_ingestion_process()
+    elapsed = time.perf_counter() - start
+    conn = scrape.event_store.connect(scrape.DB_NAME)
+    saved = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    conn.close()
+    return elapsed, completions.calls, saved
+
+if __name__ == "__main__":
+    counts = [int(a) for a in sys.argv[1:]] or [10, 50, 200]
+    pipelined = (scrape.SITE_WORKERS, scrape.EXTRACT_WORKERS)
+    servers = start_sites()
+    print(f"⏱️  scrape.py over local sites: {HOSTS} hosts, page latency {1000 * PAGE_LATENCY:.0f} ms, "
+          f"stub LLM latency {1000 * LLM_LATENCY:.0f} ms, {EVENTS_PER_PAGE} events per page")
+    print(f"   pipelined = {pipelined[0]} site workers, {pipelined[1]} extraction workers, "
+          f"{scrape.PER_HOST_LIMIT} requests per host")
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in counts:
+            urls = [f"http://127.0.0.1:{servers[i % HOSTS].server_port}/site{i}" for i in range(count)]
+            line = f"   {count:>5} sites"
+            fast, calls, saved = run(urls, *pipelined, workdir)
+            if count <= SERIAL_LIMIT:
+                slow, _, _ = run(urls, 1, 1, workdir)
+                line += f"   serial {slow:7.1f} s"
+            line += f"   pipelined {fast:6.1f} s"
+            if count <= SERIAL_LIMIT:
+                line += f"   speedup {slow / fast:5.1f}x"
+            print(f"{line}   ({calls} LLM calls, {saved} events saved)")
+    for server in servers:
+        server.shutdown()
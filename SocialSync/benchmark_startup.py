@@ -0,0 +1,42 @@
+import json
+import statistics
+import subprocess
+import sys
+
+# Worker startup cost, each run in a fresh interpreter:
+#   python benchmark_startup.py [runs]          (default 3 runs per mode)
+# import:       `import main` (what every uvicorn worker pays before serving)
+# warm-up:      rag_logic.warm_up() (services, index open, one search)
+# first search: the first user search, after warm-up ("warm") or paying the
+#               lazy construction itself ("lazy", WARM_UP=0)
+# Uses the configured EMBEDDING_PROVIDER and the live index. The query embedding
+# is served from the disk cache after the first run, in both modes alike.
+
+FIRST_QUERY = "techno party saturday"
+
+CHILD = f"""
+import json, sys, time
+start = time.perf_counter()
+import main, rag_logic
+imported = time.perf_counter()
+if sys.argv[1] == "warm":
+    rag_logic.warm_up()
+warmed = time.perf_counter()
+rag_logic.SocialSyncAgent().retrieve_events({FIRST_QUERY!r}, k=5)
+searched = time.perf_counter()
+print(json.dumps({{"import": imported - start, "warm_up": warmed - imported, "first_search": searched - warmed}}))
+"""
+
+
+def run_child(mode):
+    result = subprocess.run([sys.executable, "-c", CHILD, mode], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"⏱️  Worker startup, median of {runs} fresh processes per mode")
+    for mode in ["lazy", "warm"]:
+        samples = [run_child(mode) for _ in range(runs)]
+        median = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+        print(f"   {mode:<5} import {1000 * median['import']:7.0f} ms   warm-up {1000 * median['warm_up']:7.0f} ms   "
+              f"first search {1000 * median['first_search']:7.0f} ms")
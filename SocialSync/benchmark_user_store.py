@@ -0,0 +1,68 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from user_store import UserStore
+
+# Per-change cost of the SQLite user store as the user count grows:
+#   python benchmark_user_store.py [max users]          (default 1000000)
+# Fills a temporary users.db step by step; at each size it times single-row
+# profile updates and registrations, and one full users.json rewrite (the old
+# save_db) up to 100k users, where the rewrite is already seconds long.
+
+SIZES = [1000, 10000, 100000, 1000000]
+SAMPLES = 1000
+JSON_REWRITE_LIMIT = 100000
+FILL_BATCH = 50000
+
+
+def fill(store, start, end):
+    conn = store._conn()
+    for batch_start in range(start, end, FILL_BATCH):
+        batch_end = min(batch_start + FILL_BATCH, end)
+        with conn:
+            conn.executemany(
+                "INSERT INTO users (email, password, name, profile) VALUES (?, ?, ?, ?)",
+                [(f"user{i}@example.com", "secret", f"user{i}", "Enjoys live jazz and rooftops.")
+                 for i in range(batch_start, batch_end)]
+            )
+
+def time_updates(store, size):
+    rng = random.Random(size)
+    start = time.perf_counter()
+    for _ in range(SAMPLES):
+        store.update_profile(f"user{rng.randrange(size)}@example.com", "Likes techno and late nights.")
+    return (time.perf_counter() - start) / SAMPLES
+
+def time_registrations(store, size):
+    start = time.perf_counter()
+    for i in range(SAMPLES):
+        store.create(f"new{size}-{i}@example.com", "secret", "new")
+    return (time.perf_counter() - start) / SAMPLES
+
+def time_json_rewrite(size, path):
+    users = {f"user{i}@example.com": {"password": "secret", "name": f"user{i}", "profile": "Enjoys live jazz."}
+             for i in range(size)}
+    start = time.perf_counter()
+    with open(path, "w") as f:
+        json.dump(users, f, indent=2)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    max_users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    sizes = [s for s in SIZES if s <= max_users]
+    print(f"⏱️  users.db per-change cost, {SAMPLES} samples per size")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UserStore(os.path.join(tmp, "users.db"))
+        filled = 0
+        for size in sizes:
+            fill(store, filled, size)
+            filled = size
+            update = time_updates(store, size)
+            register = time_registrations(store, size)
+            line = f"   {size:>8} users   update {1e6 * update:7.0f} µs   register {1e6 * register:7.0f} µs"
+            if size <= JSON_REWRITE_LIMIT:
+                line += f"   users.json rewrite {1000 * time_json_rewrite(size, os.path.join(tmp, 'users.json')):8.0f} ms"
+            print(line)
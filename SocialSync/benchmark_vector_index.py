@@ -0,0 +1,88 @@
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+from langchain_chroma import Chroma
+from event_metadata import build_event_filter
+from numpy_index import NumpyIndex
+
+# Query latency of the numpy engine vs Chroma on synthetic event corpora:
+#   python benchmark_vector_index.py [size ...]        (default: 1000 10000 100000)
+# Vectors are random unit vectors (DIMENSIONS wide, like text-embedding-3-small);
+# metadata mimics real events so the upcoming/price filters are exercised too.
+
+DIMENSIONS = 1536
+QUERIES = 50
+K = 20
+CHROMA_BATCH = 5000
+CATEGORIES = ["Concert", "Theater", "Party", "Comedy", "Exhibition", "Workshop", "Fair"]
+
+
+def synthetic_corpus(size, rng):
+    vectors = rng.standard_normal((size, DIMENSIONS), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    now = int(time.time())
+    metadatas = [{
+        "event_id": i,
+        "date_ts": int(now + rng.integers(-30, 90) * 86400),
+        "price": float(rng.choice([0, 30, 50, 80, 120, 250])),
+        "category": CATEGORIES[i % len(CATEGORIES)],
+    } for i in range(size)]
+    return vectors, metadatas
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return round(1000 * statistics.median(latencies), 2), round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2)
+
+def benchmark(size, rng):
+    vectors, metadatas = synthetic_corpus(size, rng)
+    queries = rng.standard_normal((QUERIES, DIMENSIONS), dtype=np.float32)
+    where = build_event_filter(upcoming_only=True, max_price=100)
+    results = {"size": size}
+
+    index = NumpyIndex.build([m["event_id"] for m in metadatas], vectors, metadatas)
+    workdir = tempfile.mkdtemp(prefix="socialsync-bench-")
+    try:
+        index.save(workdir)
+        index = NumpyIndex.load(workdir)
+        index.search(queries[0], K, where)
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, K, where)
+            latencies.append(time.perf_counter() - start)
+        results["numpy"] = percentiles(latencies)
+
+        start = time.perf_counter()
+        index.search_batch(queries, K, where)
+        results["numpy_batch_per_query_ms"] = round(1000 * (time.perf_counter() - start) / QUERIES, 2)
+
+        store = Chroma(collection_name="bench", persist_directory=workdir)
+        for i in range(0, size, CHROMA_BATCH):
+            store._collection.add(
+                ids=[str(m["event_id"]) for m in metadatas[i:i + CHROMA_BATCH]],
+                embeddings=vectors[i:i + CHROMA_BATCH].tolist(),
+                metadatas=metadatas[i:i + CHROMA_BATCH],
+            )
+        store.similarity_search_by_vector(queries[0].tolist(), k=K, filter=where)
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            store.similarity_search_by_vector(query.tolist(), k=K, filter=where)
+            latencies.append(time.perf_counter() - start)
+        results["chroma"] = percentiles(latencies)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1000, 10000, 100000]
+    rng = np.random.default_rng(7)
+    print(f"⏱️  {QUERIES} queries, k={K}, {DIMENSIONS}-dim vectors, upcoming + price filter")
+    for size in sizes:
+        r = benchmark(size, rng)
+        print(f"   {r['size']:>7} events   numpy p50 {r['numpy'][0]} ms / p95 {r['numpy'][1]} ms "
+              f"(batched {r['numpy_batch_per_query_ms']} ms/query)   "
+              f"chroma p50 {r['chroma'][0]} ms / p95 {r['chroma'][1]} ms")
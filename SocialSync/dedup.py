@@ -0,0 +1,155 @@
+import json
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+import event_store
+from event_metadata import UNKNOWN_DATE
+
+# Tokens that appear in many titles and say nothing about which event it is
+STOPWORDS = {
+    "si", "and", "the", "de", "la", "cu", "in", "din", "pe", "un", "o", "a", "of", "feat", "ft",
+    "concert", "live", "bilete", "bilet", "show", "event", "eveniment", "tickets",
+}
+GENERIC_VENUES = {"", "bucharest", "bucuresti", "check link", "tbd"}
+
+# A pair is merged when the start times and venues agree and either the titles are
+# nearly identical, or one title's tokens are (almost) all in the other's.
+TITLE_RATIO_STRICT = 0.9
+TOKEN_CONTAINMENT = 0.9
+# Sources round or shift start times a little; further apart is another showing
+START_TOLERANCE_SECONDS = 3600
+
+
+def title_tokens(title):
+    return {t for t in event_store.fold_text(title).split() if len(t) > 1 and t not in STOPWORDS}
+
+def venues_compatible(a, b):
+    a, b = event_store.fold_text(a), event_store.fold_text(b)
+    if a in GENERIC_VENUES or b in GENERIC_VENUES or a == b:
+        return True
+    ta, tb = set(a.split()), set(b.split())
+    return len(ta & tb) / min(len(ta), len(tb)) >= 0.5
+
+def has_clock_time(ts):
+    return time.localtime(ts)[3:5] != (0, 0)
+
+def times_compatible(a, b):
+    # A bare date (midnight) matches any showing that day
+    if not has_clock_time(a) or not has_clock_time(b):
+        return True
+    return abs(a - b) <= START_TOLERANCE_SECONDS
+
+def is_same_event(a, b):
+    # Same title at two venues the same evening is a tour or two showings, not a duplicate
+    if not times_compatible(a["date_ts"], b["date_ts"]) or not venues_compatible(a["location"], b["location"]):
+        return False
+    title_a, title_b = event_store.fold_text(a["event_name"]), event_store.fold_text(b["event_name"])
+    if SequenceMatcher(None, title_a, title_b).ratio() >= TITLE_RATIO_STRICT:
+        return True
+    tokens_a, tokens_b = a["tokens"], b["tokens"]
+    if not tokens_a or not tokens_b:
+        return False
+    containment = len(tokens_a & tokens_b) / min(len(tokens_a), len(tokens_b))
+    return containment >= TOKEN_CONTAINMENT
+
+
+def find_clusters(rows):
+    """
+    Union-find over candidate pairs. Only events on the same calendar day are
+    compared, which keeps the work at sum(block_size^2) instead of n^2.
+    Returns (clusters, comparisons) where clusters are lists of row dicts.
+    """
+    blocks = defaultdict(list)
+    for row in rows:
+        if row["date_ts"] is None or row["date_ts"] == UNKNOWN_DATE:
+            continue  # no date to block on; never merged
+        day = time.strftime("%Y-%m-%d", time.localtime(row["date_ts"]))
+        blocks[day].append(row)
+
+    parent = {row["id"]: row["id"] for row in rows}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    comparisons = 0
+    for block in blocks.values():
+        for i in range(len(block)):
+            for j in range(i + 1, len(block)):
+                comparisons += 1
+                if find(block[i]["id"]) != find(block[j]["id"]) and is_same_event(block[i], block[j]):
+                    parent[find(block[j]["id"])] = find(block[i]["id"])
+
+    members = defaultdict(list)
+    for row in rows:
+        members[find(row["id"])].append(row)
+    return list(members.values()), comparisons
+
+def completeness(row):
+    """
+    Ranks cluster members: the most informative record becomes canonical (ties go to the oldest row).
+    """
+    return (
+        bool(row["description"]),
+        row["date_ts"] not in (None, UNKNOWN_DATE) and has_clock_time(row["date_ts"]),
+        row["location"] not in (None, "") and event_store.fold_text(row["location"]) not in GENERIC_VENUES,
+        bool(row["price"]),
+        len(row["event_name"] or ""),
+        -row["id"],
+    )
+
+
+def deduplicate_events(conn):
+    """
+    Clusters near-duplicate events across sources and marks every non-canonical
+    row with canonical_id. The canonical row gets all members' URLs in
+    source_urls and borrows fields it is missing. Safe to re-run: each run
+    recomputes the clustering from scratch.
+    """
+    rows = [dict(r) for r in conn.execute(
+        "SELECT id, event_name, date_ts, location, description, price, source_url FROM events"
+    )]
+    for row in rows:
+        row["tokens"] = title_tokens(row["event_name"])
+
+    clusters, comparisons = find_clusters(rows)
+
+    updates = []
+    merged_rows = 0
+    largest = 1
+    for cluster in clusters:
+        cluster.sort(key=completeness, reverse=True)
+        canonical = cluster[0]
+        urls = list(dict.fromkeys(r["source_url"] for r in cluster if r["source_url"]))
+        description = canonical["description"] or next((r["description"] for r in cluster if r["description"]), None)
+        location = canonical["location"] or next((r["location"] for r in cluster if r["location"]), None)
+        updates.append((None, json.dumps(urls), description, location, canonical["id"]))
+        for dup in cluster[1:]:
+            updates.append((canonical["id"], None, dup["description"], dup["location"], dup["id"]))
+        if len(cluster) > 1:
+            merged_rows += len(cluster) - 1
+            largest = max(largest, len(cluster))
+
+    with conn:
+        conn.executemany(
+            "UPDATE events SET canonical_id = ?, source_urls = ?, description = ?, location = ? WHERE id = ?",
+            updates
+        )
+
+    stats = {
+        "events": len(rows),
+        "canonical": len(clusters),
+        "merged": merged_rows,
+        "multi_source_clusters": sum(1 for c in clusters if len(c) > 1),
+        "largest_cluster": largest,
+        "comparisons": comparisons,
+    }
+    print(f"   🧬 Dedup: {stats['events']} events -> {stats['canonical']} canonical "
+          f"({stats['merged']} merged in {stats['multi_source_clusters']} clusters, "
+          f"largest {stats['largest_cluster']}, {stats['comparisons']} comparisons)")
+    return stats
+
+if __name__ == "__main__":
+    deduplicate_events(event_store.connect())
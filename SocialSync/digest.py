@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import numpy as np
+from dotenv import load_dotenv
+from langchain_chroma import Chroma
+from diversity import mmr_select_batch
+from email_outbox import EmailOutbox
+from email_service import render_digest_email, render_event_card
+from embedding_providers import check_index_provider, create_embeddings
+from event_metadata import build_event_filter
+from event_store import EventRepository, event_card_fields
+from index_paths import resolve_active_index
+from numpy_index import NumpyIndex
+from user_store import UserStore
+
+# Offline personalized digest:
+#   python digest.py [--top N] [--dry-run]
+# Embeds every taste profile in batches, scores each batch against all upcoming
+# events with one matrix product, picks a diverse top N per user and queues the
+# emails in the outbox (the API's sender, or any running OutboxSender, delivers them).
+
+load_dotenv(dotenv_path="./.env")
+
+DB_PATH = "./chroma_db"
+EVENTS_COLLECTION = "events"
+DIGEST_TOP_N = int(os.getenv("DIGEST_TOP_N", 5))
+# Profiles embedded and scored per step; bounds memory at batch x events floats
+DIGEST_USER_BATCH = int(os.getenv("DIGEST_USER_BATCH", 1000))
+# Users per MMR step; the (users, pool, dim) candidate tensor is the largest allocation
+MMR_CHUNK = 256
+
+
+def load_upcoming_events(spec):
+    """
+    (event_ids, normalized vectors) for upcoming events in the live index. Uses the
+    build's vectors.npy when it has one, otherwise reads the vectors out of Chroma.
+    """
+    path = resolve_active_index(DB_PATH)
+    check_index_provider(path, spec)
+    index = NumpyIndex.load(path)
+    if index is None:
+        index = NumpyIndex.from_chroma(Chroma(collection_name=EVENTS_COLLECTION, persist_directory=path))
+    mask = index.mask(build_event_filter(upcoming_only=True))
+    return index.event_ids[mask].tolist(), np.asarray(index.vectors[mask], dtype=np.float32)
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+def select_for_users(user_vectors, event_vectors, top_n):
+    """
+    (users, top_n) indices into event_vectors: one users x events product, then MMR per chunk of users.
+    """
+    scores = user_vectors @ event_vectors.T
+    picks = [
+        mmr_select_batch(scores[start:start + MMR_CHUNK], event_vectors, top_n)
+        for start in range(0, len(scores), MMR_CHUNK)
+    ]
+    return np.concatenate(picks) if picks else np.empty((0, top_n), dtype=np.int64)
+
+def run_digest(top_n=DIGEST_TOP_N, dry_run=False):
+    started = time.perf_counter()
+    embeddings, spec = create_embeddings()
+    event_ids, event_vectors = load_upcoming_events(spec)
+    if not event_ids:
+        print("📭 Digest: no upcoming events in the index, nothing to send.")
+        return {"users": 0, "events": 0, "queued": 0}
+
+    # Every card is rendered once and shared by all the digests that include it
+    rows = EventRepository().get_many(event_ids)
+    cards = {row["id"]: render_event_card(event_card_fields(row)) for row in rows}
+    print(f"🗞️  Digest: {len(event_ids)} upcoming events, top {top_n} per user")
+
+    users = UserStore()
+    outbox = EmailOutbox()
+    total_users = queued = 0
+    for batch in users.iter_profiles(DIGEST_USER_BATCH):
+        user_vectors = normalize_rows(embeddings.embed_documents([u["profile"] for u in batch]))
+        picks = select_for_users(user_vectors, event_vectors, top_n)
+        messages = []
+        for user, row in zip(batch, picks):
+            card_html = [cards[event_ids[i]] for i in row if event_ids[i] in cards]
+            if card_html:
+                subject, html_content = render_digest_email(user["name"], card_html)
+                messages.append((user["email"], subject, html_content))
+        if not dry_run:
+            outbox.enqueue_many(messages)
+        total_users += len(batch)
+        queued += len(messages)
+        print(f"   … {total_users} users scored, {queued} digests {'rendered' if dry_run else 'queued'}")
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Digest complete: {queued} digests for {total_users} users in {elapsed:.1f}s")
+    return {"users": total_users, "events": len(event_ids), "queued": 0 if dry_run else queued}
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    top = int(args[args.index("--top") + 1]) if "--top" in args else DIGEST_TOP_N
+    run_digest(top_n=top, dry_run="--dry-run" in args)
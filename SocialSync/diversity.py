@@ -0,0 +1,70 @@
+import os
+import numpy as np
+
+# 1.0 = pure relevance order, 0.0 = maximally different cards
+DIVERSITY_LAMBDA = float(os.getenv("DIVERSITY_LAMBDA", 0.5))
+
+
+def mmr_select(candidate_ids, vectors_by_id, count, lambda_mult=DIVERSITY_LAMBDA):
+    """
+    Maximal marginal relevance over an already ranked candidate list.
+
+    Relevance comes from the rank (the list may be a fused vector + keyword
+    ranking, so there is no single score to reuse); redundancy is the cosine
+    similarity to the cards already picked. Candidates without a vector keep
+    their rank relevance and are treated as unlike everything else.
+    """
+    if len(candidate_ids) <= 1 or count <= 0:
+        return list(candidate_ids[:count])
+    n = len(candidate_ids)
+    relevance = 1.0 - np.arange(n) / n
+
+    dims = next((len(v) for v in vectors_by_id.values()), 0)
+    vectors = np.zeros((n, dims), dtype=np.float32)
+    for row, event_id in enumerate(candidate_ids):
+        if event_id in vectors_by_id:
+            vectors[row] = vectors_by_id[event_id]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+    similarity = vectors @ vectors.T
+
+    picked = [0]
+    while len(picked) < min(count, n):
+        redundancy = similarity[:, picked].max(axis=1)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[picked] = -np.inf
+        picked.append(int(np.argmax(scores)))
+    return [candidate_ids[row] for row in picked]
+
+
+def mmr_select_batch(scores, vectors, count, pool=None, lambda_mult=DIVERSITY_LAMBDA):
+    """
+    Vectorized MMR for many users at once.
+
+    scores: (users, items) relevance, e.g. cosine similarity to each user's profile.
+    vectors: (items, dim) L2-normalized item vectors.
+    Each user's `pool` best items (default 4 * count) are re-ranked; returns a
+    (users, count) array of item indices, best pick first.
+    """
+    users, items = scores.shape
+    count = min(count, items)
+    pool = min(max(pool or count * 4, count), items)
+    if count == 0:
+        return np.empty((users, 0), dtype=np.int64)
+    candidates = np.argpartition(-scores, pool - 1, axis=1)[:, :pool]
+    relevance = np.take_along_axis(scores, candidates, axis=1)
+    pool_vectors = vectors[candidates]
+    similarity = np.einsum("upd,uqd->upq", pool_vectors, pool_vectors)
+
+    rows = np.arange(users)
+    picked = np.empty((users, count), dtype=np.int64)
+    chosen = np.zeros((users, pool), dtype=bool)
+    redundancy = np.zeros((users, pool), dtype=scores.dtype)
+    for step in range(count):
+        step_scores = relevance if step == 0 else lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        step_scores = np.where(chosen, -np.inf, step_scores)
+        best = np.argmax(step_scores, axis=1)
+        picked[:, step] = candidates[rows, best]
+        chosen[rows, best] = True
+        redundancy = np.maximum(redundancy, similarity[rows, :, best])
+    return picked
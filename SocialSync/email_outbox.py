@@ -0,0 +1,290 @@
+import asyncio
+import os
+import queue
+import smtplib
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from email_service import SENDER_EMAIL, build_message, open_smtp_connection
+
+# --- CONFIGURATION ---
+OUTBOX_DB = os.getenv("OUTBOX_DB", "outbox.db")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 20))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", 30))
+# Connections idle longer than this are closed instead of reused (servers drop them anyway)
+SMTP_IDLE_SECONDS = 60
+# A row stuck in 'sending' this long belonged to a sender that died mid-batch
+STALE_SENDING_SECONDS = 300
+
+
+class EmailOutbox:
+    """
+    Durable queue of outgoing emails in SQLite.
+
+    status: queued -> sending -> sent, or back to queued with a later
+    next_attempt_at after a temporary failure, or failed once the attempts
+    run out (or the server rejects the recipient outright).
+    """
+
+    def __init__(self, path=OUTBOX_DB):
+        self.path = path
+        self.local = threading.local()
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    html TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    sent_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)")
+            # Public handle for /email-status: ids are sequential, so anyone could walk them
+            if "token" not in [row[1] for row in conn.execute("PRAGMA table_info(outbox)")]:
+                conn.execute("ALTER TABLE outbox ADD COLUMN token TEXT")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_token ON outbox(token)")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def enqueue(self, recipient, subject, html):
+        """
+        Queues one email and returns its unguessable status token.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO outbox (recipient, subject, html, next_attempt_at, created_at, updated_at, token) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (recipient, subject, html, now, now, now, token)
+            )
+        return token
+
+    def enqueue_many(self, messages):
+        """
+        messages: iterable of (recipient, subject, html). One transaction for the whole batch.
+        """
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO outbox (recipient, subject, html, next_attempt_at, created_at, updated_at, token) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(recipient, subject, html, now, now, now, uuid.uuid4().hex) for recipient, subject, html in messages]
+            )
+
+    def claim_batch(self, limit=OUTBOX_BATCH_SIZE):
+        """
+        Marks up to `limit` due messages as 'sending' and returns them. Safe with
+        several senders: the claim happens inside one write transaction.
+        """
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Recover messages claimed by a sender that never reported back
+            conn.execute(
+                "UPDATE outbox SET status = 'queued' WHERE status = 'sending' AND updated_at < ?",
+                (now - STALE_SENDING_SECONDS,)
+            )
+            rows = conn.execute(
+                "SELECT id, recipient, subject, html, attempts FROM outbox "
+                "WHERE status = 'queued' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            if rows:
+                placeholders = ",".join("?" for _ in rows)
+                conn.execute(
+                    f"UPDATE outbox SET status = 'sending', updated_at = ? WHERE id IN ({placeholders})",
+                    [now] + [row["id"] for row in rows]
+                )
+        return [dict(row) for row in rows]
+
+    def mark_sent(self, ids):
+        if not ids:
+            return
+        now = time.time()
+        placeholders = ",".join("?" for _ in ids)
+        with self._conn() as conn:
+            conn.execute(
+                f"UPDATE outbox SET status = 'sent', attempts = attempts + 1, sent_at = ?, updated_at = ?, last_error = NULL "
+                f"WHERE id IN ({placeholders})",
+                [now, now] + list(ids)
+            )
+
+    def mark_failed(self, message, error, permanent=False, max_attempts=OUTBOX_MAX_ATTEMPTS, backoff=OUTBOX_BACKOFF_SECONDS):
+        """
+        Schedules a retry with exponential backoff, or gives up.
+        """
+        attempts = message["attempts"] + 1
+        now = time.time()
+        if permanent or attempts >= max_attempts:
+            status, next_attempt_at = "failed", now
+        else:
+            status, next_attempt_at = "queued", now + backoff * 2 ** (attempts - 1)
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, attempts, next_attempt_at, str(error)[:500], now, message["id"])
+            )
+
+    def status(self, token):
+        """
+        Delivery state for a status token. The recipient is left out: the caller already knows it.
+        """
+        row = self._conn().execute(
+            "SELECT status, attempts, last_error, created_at, sent_at FROM outbox WHERE token = ?",
+            (token,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def counts(self):
+        return dict(self._conn().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+    async def aenqueue(self, recipient, subject, html):
+        return await asyncio.to_thread(self.enqueue, recipient, subject, html)
+
+    async def astatus(self, token):
+        return await asyncio.to_thread(self.status, token)
+
+
+class SMTPPool:
+    """
+    Up to `size` authenticated SMTP connections, reused across batches.
+    A connection that errors is closed rather than returned to the pool.
+    """
+
+    def __init__(self, size=SMTP_POOL_SIZE, connect=open_smtp_connection):
+        self.connect = connect
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        with self.slots:
+            server = self._reuse_idle() or self.connect()
+            try:
+                yield server
+            except Exception:
+                self._close(server)
+                raise
+            self.idle.put((server, time.time()))
+
+    def _reuse_idle(self):
+        while True:
+            try:
+                server, last_used = self.idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.time() - last_used < SMTP_IDLE_SECONDS:
+                return server
+            self._close(server)
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def close(self):
+        while True:
+            try:
+                server, _ = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+
+class OutboxSender:
+    """
+    Background tasks that drain the outbox through the SMTP pool.
+
+    Each worker claims a batch, sends it over one pooled connection on a
+    thread, and records per-message results. wake() skips the poll delay
+    right after an enqueue.
+    """
+
+    def __init__(self, outbox, pool, workers=SMTP_POOL_SIZE, batch_size=OUTBOX_BATCH_SIZE, poll_interval=2.0):
+        self.outbox = outbox
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.wakeup = None
+        self._tasks = []
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.pool.close)
+
+    def wake(self):
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def _worker(self):
+        while True:
+            batch = await asyncio.to_thread(self.outbox.claim_batch, self.batch_size)
+            if not batch:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await asyncio.to_thread(self.send_batch, batch)
+            except Exception as e:
+                print(f"Email Error: outbox batch failed: {e}")
+
+    def send_batch(self, batch):
+        """
+        Sends claimed messages over one pooled connection. A dropped connection
+        requeues the rest of the batch; a refused recipient fails just that message.
+        """
+        sent = []
+        remaining = list(batch)
+        try:
+            with self.pool.connection() as server:
+                while remaining:
+                    message = remaining[0]
+                    try:
+                        server.sendmail(SENDER_EMAIL, message["recipient"],
+                                        build_message(message["recipient"], message["subject"], message["html"]))
+                        sent.append(message["id"])
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused) as e:
+                        self.outbox.mark_failed(message, e, permanent=True)
+                    except smtplib.SMTPResponseException as e:
+                        # 5xx is permanent, 4xx is worth another try
+                        self.outbox.mark_failed(message, e, permanent=e.smtp_code >= 500)
+                    remaining.pop(0)
+        except (smtplib.SMTPException, OSError) as e:
+            print(f"Email Error: {e}")
+            for message in remaining:
+                self.outbox.mark_failed(message, e)
+        finally:
+            self.outbox.mark_sent(sent)
+        return len(sent)
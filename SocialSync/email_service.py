@@ -1,69 +1,135 @@
+import html
+import re
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 
 # CONFIGURATION
-# In production, use os.getenv("EMAIL_USER")
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
-SENDER_EMAIL = "sick7bestemv14@gmail.com" # <--- REPLACE THIS
-SENDER_PASSWORD = "olnrvvvobgqcqfqz"   # <--- REPLACE THIS
+SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+# Set SMTP_STARTTLS=0 for a local plain-text stand-in (e.g. aiosmtpd)
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SENDER_EMAIL = os.getenv("EMAIL_USER", "sick7bestemv14@gmail.com") # <--- REPLACE THIS
+SENDER_PASSWORD = os.getenv("EMAIL_PASS", "olnrvvvobgqcqfqz")   # <--- REPLACE THIS
 
-def send_event_email(user_email, event_data):
+def open_smtp_connection():
     """
-    Sends an HTML email to the user with the event details.
+    Connected (and, when the server offers AUTH, logged-in) SMTP client.
     """
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = f"Event Found: {event_data.get('title', 'Cool Event')}"
-        msg["From"] = SENDER_EMAIL
-        msg["To"] = user_email
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=30)
+    if SMTP_STARTTLS:
+        server.starttls()
+    server.ehlo()
+    if server.has_extn("auth"):
+        server.login(SENDER_EMAIL, SENDER_PASSWORD)
+    return server
 
-        # HTML Content
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; border: 1px solid #ddd; border-radius: 8px; overflow: hidden;">
-                <div style="background-color: #2563EB; padding: 20px; text-align: center; color: white;">
-                    <h1 style="margin: 0;">SocialSync Event</h1>
-                    <p>We found something matching your vibe!</p>
-                </div>
+def build_message(user_email, subject, html_content):
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = SENDER_EMAIL
+    msg["To"] = user_email
+    msg.attach(MIMEText(html_content, "html"))
+    return msg.as_string()
+
+# --- TEMPLATES ---
+# Split into literal parts and field names once at import; rendering is then a
+# join over pre-built strings, cheap enough to run once per user in a digest.
+
+EMAIL_PAGE = """
+    <html>
+    <body style="font-family: Arial, sans-serif; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; border: 1px solid #ddd; border-radius: 8px; overflow: hidden;">
+            <div style="background-color: #2563EB; padding: 20px; text-align: center; color: white;">
+                <h1 style="margin: 0;">{heading}</h1>
+                <p>{intro}</p>
+            </div>
+            {cards}
+            <div style="background-color: #f9fafb; padding: 15px; text-align: center; font-size: 12px; color: #6b7280;">
+                <p>Sent by SocialSync AI Agent.</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+EVENT_CARD = """
+            <div style="padding: 20px;">
+                <h2 style="color: #1F2937;">{title}</h2>
+                <p><strong>📅 Date:</strong> {date}</p>
+                <p><strong>📍 Location:</strong> {location}</p>
+                <p><strong>💰 Cost:</strong> {cost}</p>
                 
-                <div style="padding: 20px;">
-                    <h2 style="color: #1F2937;">{event_data.get('title')}</h2>
-                    <p><strong>📅 Date:</strong> {event_data.get('date')}</p>
-                    <p><strong>📍 Location:</strong> {event_data.get('location')}</p>
-                    <p><strong>💰 Cost:</strong> {event_data.get('cost')}</p>
-                    
-                    <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
-                    
-                    <p style="font-style: italic;">"{event_data.get('description')}"</p>
-                    
-                    <div style="text-align: center; margin-top: 30px;">
-                        <a href="{event_data.get('url')}" 
-                           style="background-color: #10B981; color: white; padding: 12px 24px; text-decoration: none; border-radius: 5px; font-weight: bold;">
-                           Check Full Details
-                        </a>
-                    </div>
-                </div>
+                <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
                 
-                <div style="background-color: #f9fafb; padding: 15px; text-align: center; font-size: 12px; color: #6b7280;">
-                    <p>Sent by SocialSync AI Agent.</p>
+                <p style="font-style: italic;">"{description}"</p>
+                
+                <div style="text-align: center; margin-top: 30px;">
+                    <a href="{url}" 
+                       style="background-color: #10B981; color: white; padding: 12px 24px; text-decoration: none; border-radius: 5px; font-weight: bold;">
+                       Check Full Details
+                    </a>
                 </div>
             </div>
-        </body>
-        </html>
-        """
+            """
 
-        part = MIMEText(html_content, "html")
-        msg.attach(part)
+class CompiledTemplate:
+    """
+    '{name}' placeholders resolved ahead of time. render() escapes values unless
+    the field is listed in `raw` (for pre-rendered HTML such as the cards).
+    """
 
-        # Sending the email
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.sendmail(SENDER_EMAIL, user_email, msg.as_string())
+    def __init__(self, text, raw=()):
+        self.parts = re.split(r"\{(\w+)\}", text)   # literal, field, literal, field, ...
+        self.raw = set(raw)
+
+    def render(self, **values):
+        out = list(self.parts)
+        for i in range(1, len(out), 2):
+            value = str(values.get(out[i], ""))
+            out[i] = value if out[i] in self.raw else html.escape(value)
+        return "".join(out)
+
+PAGE_TEMPLATE = CompiledTemplate(EMAIL_PAGE, raw=("cards",))
+CARD_TEMPLATE = CompiledTemplate(EVENT_CARD)
+
+def render_event_card(event_data):
+    return CARD_TEMPLATE.render(**event_data)
+
+def render_event_email(event_data):
+    """
+    (subject, html) for one event card.
+    """
+    subject = f"Event Found: {event_data.get('title', 'Cool Event')}"
+    html_content = PAGE_TEMPLATE.render(
+        heading="SocialSync Event",
+        intro="We found something matching your vibe!",
+        cards=render_event_card(event_data),
+    )
+    return subject, html_content
+
+def render_digest_email(name, card_html):
+    """
+    (subject, html) for a digest; card_html are already rendered cards (see render_event_card).
+    """
+    subject = f"{name}, your SocialSync picks are here"
+    html_content = PAGE_TEMPLATE.render(
+        heading="Your SocialSync Picks",
+        intro=f"Hey {name}, here's what matches your vibe this week!",
+        cards="".join(card_html),
+    )
+    return subject, html_content
+
+def send_event_email(user_email, event_data):
+    """
+    Sends an HTML email to the user with the event details right away
+    (one connection per call; the API goes through email_outbox instead).
+    """
+    try:
+        subject, html_content = render_event_email(event_data)
+        server = open_smtp_connection()
+        server.sendmail(SENDER_EMAIL, user_email, build_message(user_email, subject, html_content))
         server.quit()
         
         return True, "Email sent successfully"
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import math
+import os
+from langchain_core.embeddings import Embeddings
+from event_store import fold_text
+
+# --- CONFIGURATION ---
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")     # openai | local | hashing
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", os.cpu_count() or 1))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+HASHING_DIMENSIONS = int(os.getenv("HASHING_DIMENSIONS", 512))
+INDEX_PROVIDER_FILE = "embedding_provider"
+# Indexes built before the provider was recorded all used the OpenAI model
+LEGACY_PROVIDER = {"provider": "openai", "model": "text-embedding-3-small"}
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    CPU-only sentence-transformers model, loaded on first use. Documents are
+    encoded in batches of `batch_size` using `threads` torch threads.
+    Vectors are L2-normalized, so Chroma's distance ranks like cosine similarity.
+    """
+
+    def __init__(self, model_name=LOCAL_EMBEDDING_MODEL, threads=EMBEDDING_THREADS, batch_size=EMBEDDING_BATCH_SIZE):
+        self.model_name = model_name
+        self.threads = threads
+        self.batch_size = batch_size
+        self.model = None
+
+    def _model(self):
+        if self.model is None:
+            import torch  # optional dependencies, only needed for this provider
+            from sentence_transformers import SentenceTransformer
+            torch.set_num_threads(self.threads)
+            self.model = SentenceTransformer(self.model_name, device="cpu")
+        return self.model
+
+    def embed_documents(self, texts):
+        vectors = self._model().encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True)
+        return vectors.tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words vectors (folded words and word bigrams hashed
+    into `dimensions` signed buckets). No model, no network: meant for tests
+    and offline runs, not for ranking quality.
+    """
+
+    def __init__(self, dimensions=HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _features(self, text):
+        words = fold_text(text).split()
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_query(self, text):
+        vector = [0.0] * self.dimensions
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def provider_spec(provider=EMBEDDING_PROVIDER):
+    """
+    What gets recorded next to an index: vectors are only comparable when the whole spec matches.
+    """
+    if provider == "openai":
+        return {"provider": "openai", "model": OPENAI_EMBEDDING_MODEL}
+    if provider == "local":
+        return {"provider": "local", "model": LOCAL_EMBEDDING_MODEL}
+    if provider == "hashing":
+        return {"provider": "hashing", "model": f"hashing-{HASHING_DIMENSIONS}"}
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER: {provider}")
+
+def create_embeddings(provider=EMBEDDING_PROVIDER):
+    """
+    Returns (embeddings, spec) for the configured provider.
+    """
+    spec = provider_spec(provider)
+    if provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=spec["model"]), spec
+    if provider == "local":
+        return LocalEmbeddings(spec["model"]), spec
+    return HashingEmbeddings(), spec
+
+def spec_name(spec):
+    return f"{spec['provider']}:{spec['model']}"
+
+
+# --- INDEX RECORD ---
+
+def read_index_provider(db_path):
+    """
+    Provider spec recorded by ingest.py in an index build (LEGACY_PROVIDER if none was recorded).
+    """
+    try:
+        with open(os.path.join(db_path, INDEX_PROVIDER_FILE), "r") as f:
+            return json.load(f)
+    except OSError:
+        return dict(LEGACY_PROVIDER)
+
+def write_index_provider(db_path, spec):
+    with open(os.path.join(db_path, INDEX_PROVIDER_FILE), "w") as f:
+        json.dump(spec, f)
+
+def check_index_provider(db_path, spec):
+    """
+    Raises if the index at db_path was embedded with a different provider or model;
+    querying it would silently return garbage (or fail on the vector size).
+    """
+    recorded = read_index_provider(db_path)
+    if recorded != spec:
+        raise RuntimeError(
+            f"Index at {db_path} was built with {spec_name(recorded)} but EMBEDDING_PROVIDER "
+            f"is configured for {spec_name(spec)}. Re-run ingest.py or change the configuration."
+        )
@@ -0,0 +1,73 @@
+import asyncio
+import sys
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from history import HistoryManager, count_tokens
+from rag_logic import SocialSyncAgent
+
+# Prompt size over a long scripted conversation:
+#   python eval_history.py [turns]          (default 100)
+# Replays the /chat flow (reply, every fourth turn a search with its
+# SEARCH_EXECUTED / SYSTEM follow-up messages, then compaction) against a stub
+# LLM. Prompt sizes must stay within PROMPT_TOKEN_BUDGET however long the chat
+# gets; the full transcript size is shown for comparison. Exits with 1 if not.
+
+CHECKPOINTS = [1, 10, 25, 50, 100, 250, 500]
+SUMMARY_TEXT = ("User is a Bass Head: wants techno and house, late nights, Old Town or Control club, "
+                "budget around 100 lei. Shown several club nights and one rooftop party; liked the "
+                "warehouse events, found the rooftop too fancy. ") * 2
+
+
+class StubLLM:
+    async def ainvoke(self, messages):
+        return AIMessage(content=SUMMARY_TEXT)
+
+
+def user_message(turn):
+    return (f"Turn {turn}: honestly I'm still in the mood for something loud with a proper sound system, "
+            f"maybe a warehouse party, nothing too fancy, and ideally not too far from the center.")
+
+def ai_message(turn):
+    return (f"Love that energy for turn {turn}! You're giving full Bass Head vibes 🔊. "
+            f"Any preference on the night or how much you want to spend?")
+
+async def replay(turns):
+    manager = HistoryManager()
+    llm = StubLLM()
+    agent = SocialSyncAgent(llm=llm)
+    agent.chat_history.append(SystemMessage(content="[USER CONTEXT]\nThe user has previously enjoyed: \"techno\"."))
+    full_transcript = count_tokens(agent.chat_history)
+    largest = 0
+    rows = []
+    for turn in range(1, turns + 1):
+        agent.chat_history.append(HumanMessage(content=user_message(turn)))
+        full_transcript += count_tokens(agent.chat_history[-1:])
+        prompt = manager.build_prompt(agent.chat_history)
+        largest = max(largest, count_tokens(prompt))
+        reply = AIMessage(content=ai_message(turn))
+
+        if turn % 4 == 0:
+            agent.chat_history.append(AIMessage(content="SEARCH_EXECUTED"))
+            agent.chat_history.append(SystemMessage(content="SYSTEM: You just showed 2 MORE events. Briefly ask if these are better."))
+            full_transcript += count_tokens(agent.chat_history[-2:])
+            largest = max(largest, count_tokens(manager.build_prompt(agent.chat_history)))
+        agent.chat_history.append(reply)
+        full_transcript += count_tokens([reply])
+
+        compacted = await manager.compact(agent.chat_history, llm)
+        if compacted is not None:
+            agent.chat_history = compacted
+        if turn in CHECKPOINTS or turn == turns:
+            rows.append((turn, count_tokens(prompt), count_tokens(agent.chat_history), full_transcript))
+    return manager, largest, rows
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    manager, largest, rows = asyncio.run(replay(turns))
+    print(f"📏 {turns}-turn scripted chat, budget {manager.budget} tokens, compaction above {manager.compact_at}")
+    for turn, prompt, stored, full in rows:
+        print(f"   turn {turn:>4}   prompt {prompt:6d}   stored session {stored:6d}   full transcript {full:7d}")
+    print(f"   largest prompt {largest} tokens, {manager.stats['compactions']} compactions")
+    if largest > manager.budget:
+        print("❌ Prompt exceeded the token budget")
+        sys.exit(1)
+    print("✅ Prompt size stayed within the budget")
@@ -0,0 +1,66 @@
+import random
+import sys
+import time
+from intent_classifier import INTENT_CONFIDENCE, INTENTS, IntentClassifier, load_examples
+
+# Cross-validated check of the local intent classifier:
+#   python eval_intents.py [folds]          (default 5 folds)
+# For each intent and confidence threshold: coverage (share of messages decided
+# locally, i.e. LLM calls skipped) and accuracy of those local decisions. Use it
+# to pick INTENT_CONFIDENCE after editing data_eval/intent_examples.json.
+
+THRESHOLDS = [0.7, 0.8, 0.9]
+
+
+def cross_validate(examples, folds=5):
+    """
+    [(example, model)] pairs where the model never saw the example.
+    """
+    shuffled = list(examples)
+    random.Random(7).shuffle(shuffled)
+    scored = []
+    for fold in range(folds):
+        held_out = shuffled[fold::folds]
+        training = [e for i, e in enumerate(shuffled) if i % folds != fold]
+        model = IntentClassifier.train(training)
+        scored.extend((e, model) for e in held_out)
+    return scored
+
+def report(scored, threshold):
+    """
+    {intent: (coverage, accuracy, wrong yes)}. A wrong yes is the costly mistake:
+    a wrong confirm skips the reply, while a wrong no only means no LLM call was saved.
+    """
+    rows = {}
+    for intent in INTENTS:
+        decided = correct = wrong_yes = 0
+        for example, model in scored:
+            verdict = model.decide(intent, example["text"], confidence=threshold)
+            if verdict is None:
+                continue
+            decided += 1
+            correct += verdict == (intent in example["labels"])
+            wrong_yes += verdict and intent not in example["labels"]
+        rows[intent] = (decided / len(scored), correct / decided if decided else 0.0, wrong_yes)
+    return rows
+
+if __name__ == "__main__":
+    folds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    examples = load_examples()
+    print(f"📏 {len(examples)} labelled messages, {folds}-fold cross-validation")
+    scored = cross_validate(examples, folds)
+    for threshold in THRESHOLDS:
+        marker = "  <- INTENT_CONFIDENCE" if threshold == INTENT_CONFIDENCE else ""
+        print(f"   confidence {threshold:.2f}{marker}")
+        for intent, (coverage, accuracy, wrong_yes) in report(scored, threshold).items():
+            print(f"      {intent:<10} decided locally {coverage:6.1%}   accuracy {accuracy:6.1%}   wrong yes {wrong_yes}")
+
+    vibe_checks_skipped = sum(model.taste_signal([e["text"]]) is not None for e, model in scored)
+    print(f"   profile vibe check answered locally for {vibe_checks_skipped / len(scored):.1%} of messages")
+
+    model = IntentClassifier.train(examples)
+    start = time.perf_counter()
+    for example in examples * 20:
+        model.probabilities(example["text"])
+    per_message = (time.perf_counter() - start) / (len(examples) * 20)
+    print(f"⏱️  {1e6 * per_message:.0f} µs per message (all intents)")
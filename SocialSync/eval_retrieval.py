@@ -0,0 +1,64 @@
+import json
+import statistics
+import sys
+import time
+import event_store
+from event_store import fold_text
+from rag_logic import SocialSyncAgent, get_embeddings
+
+# Offline retrieval evaluation against the live index:
+#   python eval_retrieval.py [k]          (default k=5)
+# Each labelled query lists folded title fragments; an event is relevant when
+# its title contains one of them. Reports recall@k and search latency for the
+# vector, bm25 and hybrid modes. Query embeddings are computed once up front so
+# the latency compares the searches, not the embedding API.
+
+QUERIES_FILE = "data_eval/retrieval_queries.json"
+MODES = ["vector", "bm25", "hybrid"]
+
+
+def relevant_ids(conn, fragments):
+    return {
+        row["id"] for row in conn.execute("SELECT id, event_name FROM events WHERE canonical_id IS NULL")
+        if any(fragment in fold_text(row["event_name"]) for fragment in fragments)
+    }
+
+def evaluate(k=5):
+    with open(QUERIES_FILE, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    conn = event_store.connect()
+    labelled = [(q["query"], relevant_ids(conn, q["relevant"])) for q in queries]
+    conn.close()
+    labelled = [(query, ids) for query, ids in labelled if ids]
+
+    agent = SocialSyncAgent()
+    for query, _ in labelled:
+        get_embeddings().embed_query(f"Event in Bucharest: {query}")
+
+    print(f"📏 {len(labelled)} labelled queries, k={k}")
+    report = {}
+    for mode in MODES:
+        recalls, latencies, misses = [], [], []
+        for query, relevant in labelled:
+            start = time.perf_counter()
+            found = agent.retrieve_events(query, k=k, upcoming_only=False, mode=mode)
+            latencies.append(time.perf_counter() - start)
+            # A query with more relevant events than k can at best find k of them
+            recall = len(relevant & set(found)) / min(len(relevant), k)
+            recalls.append(recall)
+            if recall == 0:
+                misses.append(query)
+        latencies.sort()
+        report[mode] = {
+            "recall_at_k": round(statistics.mean(recalls), 3),
+            "p50_ms": round(1000 * statistics.median(latencies), 2),
+            "p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2),
+            "misses": misses,
+        }
+        print(f"   {mode:<7} recall@{k} {report[mode]['recall_at_k']:<6} "
+              f"p50 {report[mode]['p50_ms']} ms   p95 {report[mode]['p95_ms']} ms   "
+              f"zero-hit queries: {len(misses)}")
+    return report
+
+if __name__ == "__main__":
+    evaluate(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
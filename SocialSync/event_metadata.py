@@ -0,0 +1,129 @@
+import datetime
+import re
+
+# Chroma metadata can't hold None, so events without a usable date get this sentinel
+UNKNOWN_DATE = -1
+
+# Words in a search query that map onto the scraper's category labels
+CATEGORY_KEYWORDS = {
+    "concert": "Concert",
+    "live music": "Concert",
+    "theater": "Theater",
+    "theatre": "Theater",
+    "teatru": "Theater",
+    "party": "Party",
+    "petrecere": "Party",
+    "rave": "Party",
+    "workshop": "Workshop",
+    "atelier": "Workshop",
+    "exhibition": "Exhibition",
+    "expozitie": "Exhibition",
+    "comedy": "Comedy",
+    "stand-up": "Comedy",
+    "stand up": "Comedy",
+    "fair": "Fair",
+    "targ": "Fair",
+}
+
+PRICE_CAP_PATTERN = re.compile(r"(?:\b(?:under|below|less than|max|sub)|<)\s*(\d+(?:[.,]\d+)?)\s*(?:ron|lei)?", re.IGNORECASE)
+FREE_PATTERN = re.compile(r"\b(free|gratis|gratuit|intrare libera)\b", re.IGNORECASE)
+
+
+def parse_event_fields(raw_text):
+    """
+    Reads the 'Key: value' lines of an event chunk into a dict.
+    """
+    info = {}
+    for line in raw_text.split('\n'):
+        if ": " in line:
+            key, val = line.split(": ", 1)
+            info[key.strip()] = val.strip()
+    return info
+
+def parse_date_ts(value):
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(datetime.datetime.strptime(value, fmt).timestamp())
+        except (TypeError, ValueError):
+            continue
+    return UNKNOWN_DATE
+
+def parse_price(value):
+    """
+    '53 RON' -> 53.0. Free or unknown prices ('Free / Check Link') count as 0, like the scraper does.
+    """
+    match = re.search(r"\d+(?:[.,]\d+)?", value or "")
+    return float(match.group(0).replace(",", ".")) if match else 0.0
+
+
+def parse_search_filters(search_query):
+    """
+    Pulls explicit constraints out of a SEARCH_ACTION query:
+    "techno party under 50 RON" -> {"max_price": 50.0, "category": "Party"}
+    """
+    filters = {}
+    lowered = search_query.lower()
+
+    match = PRICE_CAP_PATTERN.search(search_query)
+    if match:
+        filters["max_price"] = float(match.group(1).replace(",", "."))
+    elif FREE_PATTERN.search(search_query):
+        filters["max_price"] = 0.0
+
+    for keyword, category in CATEGORY_KEYWORDS.items():
+        if re.search(rf"\b{re.escape(keyword)}\b", lowered):
+            filters["category"] = category
+            break
+
+    return filters
+
+def build_event_filter(upcoming_only=True, max_price=None, category=None, exclude_ids=None):
+    """
+    Chroma `where` clause for the given constraints (None when unconstrained).
+    exclude_ids drops events the user has already been shown.
+    """
+    clauses = []
+    if upcoming_only:
+        start_of_today = int(datetime.datetime.combine(datetime.date.today(), datetime.time()).timestamp())
+        clauses.append({"$or": [{"date_ts": {"$gte": start_of_today}}, {"date_ts": {"$eq": UNKNOWN_DATE}}]})
+    if max_price is not None:
+        clauses.append({"price": {"$lte": float(max_price)}})
+    if category:
+        clauses.append({"category": {"$eq": category}})
+    if exclude_ids:
+        clauses.append({"event_id": {"$nin": sorted(exclude_ids)}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+FILTER_OPERATORS = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$gt": lambda value, target: value is not None and value > target,
+    "$gte": lambda value, target: value is not None and value >= target,
+    "$lt": lambda value, target: value is not None and value < target,
+    "$lte": lambda value, target: value is not None and value <= target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+}
+
+def matches_filter(metadata, where):
+    """
+    Evaluates a Chroma-style `where` clause (as built by build_event_filter) against a metadata dict.
+    """
+    if not where:
+        return True
+    if "$and" in where:
+        return all(matches_filter(metadata, clause) for clause in where["$and"])
+    if "$or" in where:
+        return any(matches_filter(metadata, clause) for clause in where["$or"])
+    for field, condition in where.items():
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(field)
+        if not all(FILTER_OPERATORS[op](value, target) for op, target in condition.items()):
+            return False
+    return True
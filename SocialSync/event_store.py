@@ -0,0 +1,274 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from urllib.parse import urlsplit, urlunsplit
+from event_metadata import parse_date_ts, parse_event_fields, parse_price
+
+EVENTS_DB = "events.db"
+# Ids per query in EventStore.get_many, well under SQLite's bound-variable limit
+GET_MANY_CHUNK = 500
+# Text dump written by older versions of scrape.py; imported once into an empty events table
+LEGACY_TEXT_DUMP = os.path.join("data_raw", "scraped_events.txt")
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_key TEXT NOT NULL UNIQUE,
+        event_name TEXT NOT NULL,
+        price REAL,
+        date_time TEXT,
+        date_ts INTEGER,
+        available_seats INTEGER,
+        category TEXT,
+        location TEXT,
+        description TEXT,
+        source_url TEXT,
+        listing_url TEXT,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        canonical_id INTEGER,
+        source_urls TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_events_date_ts ON events(date_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_events_category ON events(category)",
+    "CREATE INDEX IF NOT EXISTS idx_events_price ON events(price)",
+    "CREATE INDEX IF NOT EXISTS idx_events_last_seen ON events(last_seen)",
+    "CREATE INDEX IF NOT EXISTS idx_events_canonical ON events(canonical_id)",
+]
+
+# Columns added after the upsert schema first shipped: (name, type)
+ADDED_COLUMNS = [("canonical_id", "INTEGER"), ("source_urls", "TEXT")]
+
+UPSERT_SQL = """
+    INSERT INTO events (event_key, event_name, price, date_time, date_ts, available_seats,
+                        category, location, description, source_url, listing_url, first_seen, last_seen)
+    VALUES (?, ?, ?, ?, ?, NULL, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(event_key) DO UPDATE SET
+        event_name = excluded.event_name,
+        price = excluded.price,
+        date_time = excluded.date_time,
+        date_ts = excluded.date_ts,
+        category = excluded.category,
+        location = excluded.location,
+        description = excluded.description,
+        source_url = excluded.source_url,
+        listing_url = excluded.listing_url,
+        last_seen = excluded.last_seen
+"""
+
+
+def fold_text(text):
+    """
+    Lowercase, strip diacritics (ș/ş, ț/ţ, ă, â, î...) and collapse everything non-alphanumeric to single spaces.
+    """
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+def canonical_url(url):
+    """
+    Scheme + lowercase host + path without trailing slash; query and fragment dropped.
+    """
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+def event_key(ev, listing_url):
+    """
+    Natural key: the event's own page when the extractor found one, otherwise
+    normalized name + day + venue (listing URLs are shared by every event on the page).
+    """
+    url = ev.get("event_url") or ""
+    if url.startswith("http") and canonical_url(url) != canonical_url(listing_url):
+        return "url:" + canonical_url(url)
+    day = str(ev.get("date") or "")[:10]
+    return f"nv:{fold_text(ev.get('name'))}|{day}|{fold_text(ev.get('location'))}"
+
+
+def connect(path=EVENTS_DB):
+    """
+    Connection for the writers (scrape.py, ingest.py, dedup.py); upgrades the schema if needed.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    ensure_schema(conn)
+    return conn
+
+def connect_readonly(path=EVENTS_DB):
+    """
+    Connection for the API. It never migrates: an events.db older than the
+    upsert schema raises until scrape.py or ingest.py has upgraded it.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only=ON")
+    check_schema(conn)
+    return conn
+
+def check_schema(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+    missing = [name for name in ["event_key"] + [name for name, _ in ADDED_COLUMNS] if name not in columns]
+    if missing:
+        raise RuntimeError(
+            f"events.db has an outdated schema (missing {', '.join(missing)}). "
+            f"Run scrape.py or ingest.py to upgrade it before starting the API."
+        )
+
+def ensure_schema(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(events)")]
+    if columns and "event_key" not in columns:
+        # The old table was rebuilt on every scrape anyway; import_text_dump can refill it
+        print("   [DB] Replacing legacy events table with the upsert schema.")
+        conn.execute("DROP TABLE events")
+        columns = []
+    for name, sql_type in ADDED_COLUMNS:
+        if columns and name not in columns:
+            conn.execute(f"ALTER TABLE events ADD COLUMN {name} {sql_type}")
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+def upsert_events(conn, events, listing_url, seen_at=None):
+    """
+    Inserts or refreshes a batch of extracted events in one transaction.
+    first_seen is kept from the first sighting; everything else, including last_seen, is updated.
+    Returns the number of rows written.
+    """
+    seen_at = seen_at or time.time()
+    rows = []
+    for ev in events:
+        if not ev.get("name"):
+            continue
+        url = ev.get("event_url")
+        if not url or "http" not in url:
+            url = listing_url
+        rows.append((
+            event_key(ev, listing_url),
+            ev.get("name"),
+            ev.get("price", 0),
+            ev.get("date"),
+            parse_date_ts(ev.get("date")),
+            ev.get("category"),
+            ev.get("location"),
+            ev.get("description"),
+            url,
+            listing_url,
+            seen_at,
+            seen_at,
+        ))
+    with conn:
+        conn.executemany(UPSERT_SQL, rows)
+    return len(rows)
+
+def import_text_dump(conn, path=LEGACY_TEXT_DUMP):
+    """
+    One-shot import of the old scraped_events.txt format into an empty events table.
+    Returns the number of rows written (0 if the table already has data or there is no dump).
+    """
+    if conn.execute("SELECT 1 FROM events LIMIT 1").fetchone() or not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        chunks = f.read().split("------------------------------------------------")
+    events = []
+    for chunk in chunks:
+        info = parse_event_fields(chunk)
+        if "Event" not in info:
+            continue
+        events.append({
+            "name": info["Event"],
+            "category": info.get("Category"),
+            "description": info.get("Description"),
+            "date": info.get("Date"),
+            "location": info.get("Location"),
+            "price": parse_price(info.get("Cost")),
+            "event_url": info.get("Source"),
+        })
+    count = upsert_events(conn, events, listing_url="")
+    print(f"   [DB] Imported {count} events from {path}.")
+    return count
+
+
+# --- READ SIDE ---
+
+def format_cost(price):
+    return f"{price:g} RON" if price else "Free / Check Link"
+
+def render_event_text(row):
+    """
+    Text that gets embedded for an event (same layout the RAG index always used).
+    """
+    return f"""Event: {row['event_name']}
+Category: {row['category'] or 'General'}
+Description: {row['description'] or 'No description available.'}
+Target Audience: General.
+Date: {row['date_time'] or 'Upcoming'}
+Location: {row['location'] or 'Bucharest'}
+Cost: {format_cost(row['price'])}
+Source: {row['source_url'] or '#'}"""
+
+def event_row_metadata(row):
+    """
+    Filterable vector-store metadata for an event row; event_id links the vector back to the row.
+    """
+    return {
+        "source": "event",
+        "event_id": row["id"],
+        "title": row["event_name"],
+        "date_ts": row["date_ts"],
+        "price": float(row["price"] or 0),
+        "category": row["category"] or "General",
+        "location": row["location"] or "Bucharest",
+        "url": row["source_url"] or "#",
+    }
+
+def event_card_fields(row):
+    """
+    Fields for main.EventData.
+    """
+    return {
+        "title": row["event_name"],
+        "date": row["date_time"] or "TBD",
+        "location": row["location"] or "Check Link",
+        "cost": format_cost(row["price"]),
+        "description": row["description"] or "",
+        "url": row["source_url"] or "#",
+    }
+
+
+class EventRepository:
+    """
+    Read access to events.db for the API (thread-local connections, batched lookups by id).
+    """
+
+    def __init__(self, path=EVENTS_DB):
+        self.path = path
+        self.local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = connect_readonly(self.path)
+            self.local.conn = conn
+        return conn
+
+    def get_many(self, ids):
+        """
+        Rows for the given ids, in the same order; ids that no longer exist are skipped.
+        """
+        ids = list(ids)
+        by_id = {}
+        # One IN (...) per chunk: SQLite caps the number of bound variables per statement
+        for start in range(0, len(ids), GET_MANY_CHUNK):
+            chunk = ids[start:start + GET_MANY_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = self._conn().execute(f"SELECT * FROM events WHERE id IN ({placeholders})", chunk).fetchall()
+            by_id.update((row["id"], row) for row in rows)
+        return [by_id[i] for i in ids if i in by_id]
+
+    async def aget_many(self, ids):
+        return await asyncio.to_thread(self.get_many, ids)
@@ -0,0 +1,219 @@
+import datetime
+import json
+import re
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup
+
+# Deterministic extractors that run before the LLM. Each one returns events in
+# the same shape extract_structured_data produces:
+#   {"name", "price", "date": "YYYY-MM-DD HH:MM", "location", "category", "description", "event_url"}
+# An empty list means "no match here", and the caller falls back to the LLM.
+
+EXTRACTORS = []
+
+def site_extractor(name, hosts=None):
+    """
+    Registers an extractor. `hosts` limits it to those domains (and their
+    subdomains); None makes it apply to every site.
+    """
+    def register(fn):
+        EXTRACTORS.append({"name": name, "hosts": hosts, "fn": fn})
+        return fn
+    return register
+
+def host_matches(url, hosts):
+    if hosts is None:
+        return True
+    netloc = urlparse(url).netloc.lower()
+    return any(netloc == h or netloc.endswith("." + h) for h in hosts)
+
+def run_extractors(html_content, url):
+    """
+    Returns (extractor_name, events) from the first extractor that finds
+    anything, or (None, []) when the page needs the LLM.
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for extractor in EXTRACTORS:
+        if not host_matches(url, extractor["hosts"]):
+            continue
+        try:
+            events = [ev for ev in extractor["fn"](soup, url) if ev.get("name")]
+        except Exception as e:
+            print(f"      [Extractor Error] {extractor['name']} on {url}: {e}")
+            continue
+        if events:
+            return extractor["name"], events
+    return None, []
+
+
+# --- FIELD HELPERS ---
+
+# Listing dates as Romanian sites print them: "sâm 06 dec 2025, 20:00", "6 decembrie 2025"
+RO_MONTHS = {"ian": 1, "feb": 2, "mar": 3, "apr": 4, "mai": 5, "iun": 6,
+             "iul": 7, "aug": 8, "sep": 9, "oct": 10, "noi": 11, "nov": 11, "dec": 12}
+RO_DATE = re.compile(r"\b(\d{1,2})\s+([^\W\d_]{3,})\.?(?:\s+(\d{4}))?(?:\D+?(\d{1,2}):(\d{2}))?")
+
+def romanian_date(value, today=None):
+    """
+    datetime for a day + Romanian month name (+ optional year and time), or None.
+    A missing year is this year's date, or next year's if that one is over a month gone.
+    """
+    match = RO_DATE.search(value)
+    month = RO_MONTHS.get(match.group(2)[:3].lower()) if match else None
+    if not month:
+        return None
+    day, _, year, hour, minute = match.groups()
+    # A range ("31 oct - 30 nov 2025") prints the year once, at the end
+    later_year = re.search(r"\b\d{4}\b", value[match.end():])
+    year = year or (later_year.group(0) if later_year else None)
+    today = today or datetime.date.today()
+    try:
+        when = datetime.datetime(int(year or today.year), month, int(day), int(hour or 0), int(minute or 0))
+        if not year and when.date() < today - datetime.timedelta(days=31):
+            when = when.replace(year=today.year + 1)
+    except ValueError:
+        return None
+    return when
+
+def normalize_date(value):
+    """
+    ISO 8601, 'DD.MM.YYYY[ HH:MM]' or a Romanian '06 dec 2025' -> 'YYYY-MM-DD HH:MM'.
+    Unknown formats pass through.
+    """
+    if not value:
+        return "Upcoming"
+    value = value.strip()
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M")
+    except ValueError:
+        pass
+    for fmt in ("%d.%m.%Y %H:%M", "%d.%m.%Y"):
+        try:
+            return datetime.datetime.strptime(value, fmt).strftime("%Y-%m-%d %H:%M")
+        except ValueError:
+            continue
+    when = romanian_date(value)
+    return when.strftime("%Y-%m-%d %H:%M") if when else value
+
+def lowest_price(text):
+    """
+    Lowest number in a price string ('50 - 120 lei' -> 50). Free or missing -> 0, like the LLM prompt.
+    """
+    numbers = [float(n.replace(",", ".")) for n in re.findall(r"\d+(?:[.,]\d+)?", text or "")]
+    return min(numbers) if numbers else 0
+
+def short_description(text, max_words=15):
+    words = (text or "").split()
+    return " ".join(words[:max_words])
+
+
+# --- JSON-LD (schema.org/Event), any site ---
+
+JSONLD_CATEGORIES = {
+    "MusicEvent": "Concert",
+    "TheaterEvent": "Theater",
+    "ComedyEvent": "Comedy",
+    "DanceEvent": "Party",
+    "ExhibitionEvent": "Exhibition",
+    "EducationEvent": "Workshop",
+    "Festival": "Concert",
+    "SportsEvent": "Sports",
+}
+
+def _jsonld_nodes(data):
+    if isinstance(data, list):
+        for item in data:
+            yield from _jsonld_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        for key in ("@graph", "itemListElement", "item"):
+            if key in data:
+                yield from _jsonld_nodes(data[key])
+
+def _is_event(node):
+    types = node.get("@type", [])
+    types = types if isinstance(types, list) else [types]
+    return any(isinstance(t, str) and (t == "Festival" or t.endswith("Event")) for t in types), types
+
+def _offer_price(offers):
+    offers = offers if isinstance(offers, list) else [offers]
+    prices = []
+    for offer in offers:
+        if isinstance(offer, dict):
+            for key in ("price", "lowPrice"):
+                if offer.get(key) not in (None, ""):
+                    prices.append(lowest_price(str(offer[key])))
+    return min(prices) if prices else 0
+
+@site_extractor("jsonld")
+def extract_jsonld_events(soup, url):
+    events = []
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        for node in _jsonld_nodes(data):
+            is_event, types = _is_event(node)
+            if not is_event:
+                continue
+            location = node.get("location") or {}
+            if isinstance(location, list):
+                location = location[0] if location else {}
+            category = next((JSONLD_CATEGORIES[t] for t in types if t in JSONLD_CATEGORIES), "General")
+            events.append({
+                "name": (node.get("name") or "").strip(),
+                "price": _offer_price(node.get("offers")),
+                "date": normalize_date(node.get("startDate")),
+                "location": location.get("name", "Bucharest") if isinstance(location, dict) else str(location),
+                "category": category,
+                "description": short_description(node.get("description")),
+                "event_url": urljoin(url, node.get("url") or url),
+            })
+    return events
+
+
+# --- CSS LAYOUTS (known listing markup) ---
+# Selectors are relative to each listing item. Keep them in sync with the live
+# pages: when a site changes its markup the extractor just returns nothing and
+# the LLM path takes over. data_eval/pages has a saved listing per layout,
+# checked by test_extractors.py.
+
+CSS_LAYOUTS = {
+    "iabilet": {
+        "hosts": ["iabilet.ro"],
+        "item": "div.event-list-item",
+        "name": ".title a",
+        "link": ".title a",
+        "date": ".date",
+        "location": ".location",
+        "price": ".price",
+        "category": None,
+    },
+}
+
+def css_layout_extractor(layout):
+    def select_text(item, selector):
+        if not selector:
+            return ""
+        node = item.select_one(selector)
+        return node.get_text(" ", strip=True) if node else ""
+
+    def extract(soup, url):
+        events = []
+        for item in soup.select(layout["item"]):
+            link = item.select_one(layout["link"]) if layout.get("link") else None
+            events.append({
+                "name": select_text(item, layout["name"]),
+                "price": lowest_price(select_text(item, layout.get("price"))),
+                "date": normalize_date(select_text(item, layout.get("date"))),
+                "location": select_text(item, layout.get("location")) or "Bucharest",
+                "category": select_text(item, layout.get("category")) or "General",
+                "description": short_description(select_text(item, layout.get("description"))),
+                "event_url": urljoin(url, link["href"]) if link and link.has_attr("href") else url,
+            })
+        return events
+    return extract
+
+for _name, _layout in CSS_LAYOUTS.items():
+    site_extractor(f"css:{_name}", hosts=_layout["hosts"])(css_layout_extractor(_layout))
@@ -0,0 +1,163 @@
+import os
+from functools import lru_cache
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from telemetry import LLM_TOKENS, log
+
+# --- CONFIGURATION ---
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 4000))
+COMPACT_AT_TOKENS = int(os.getenv("COMPACT_AT_TOKENS", 6000))
+KEEP_RECENT_MESSAGES = int(os.getenv("KEEP_RECENT_MESSAGES", 8))
+
+SUMMARY_TAG = "[CONVERSATION SUMMARY]"
+USER_CONTEXT_TAG = "[USER CONTEXT]"
+
+SUMMARY_PROMPT = """
+[ACTION: CONVERSATION SUMMARY]
+Role: NOTE TAKER (Not a chatbot).
+Merge the previous summary and the transcript below into a short running summary.
+
+RULES:
+1. Keep the user's mood, tastes, assigned Personality Type, and any location/time/budget they gave.
+2. Keep which events were already shown and how the user reacted.
+3. Max 120 words. No greetings, no conversational language.
+"""
+
+# --- TOKEN COUNTING ---
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken missing or no encoding files offline
+    _encoding = None
+
+@lru_cache(maxsize=4096)
+def count_text_tokens(text):
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+def count_tokens(messages):
+    # +4 per message for the role/formatting overhead of the chat format
+    return sum(count_text_tokens(m.content) + 4 for m in messages)
+
+
+def is_control_message(message):
+    """
+    Bookkeeping messages that only matter for the call they were written for.
+    """
+    if isinstance(message, AIMessage):
+        return message.content == "SEARCH_EXECUTED"
+    if isinstance(message, SystemMessage):
+        return message.content.startswith("SYSTEM:")
+    return False
+
+def is_pinned(index, message):
+    """
+    The base system prompt, the injected user context and the running summary are always sent.
+    """
+    if index == 0:
+        return True
+    return isinstance(message, SystemMessage) and (
+        USER_CONTEXT_TAG in message.content or message.content.startswith(SUMMARY_TAG)
+    )
+
+
+class HistoryManager:
+    """
+    Keeps what we send to the model within a token budget.
+
+    build_prompt() is applied to every call: pinned messages always go out,
+    control messages from earlier turns are dropped, and the newest turns are
+    added verbatim until the budget is used up. Once the stored transcript
+    passes COMPACT_AT_TOKENS, compact() folds the older turns into a running
+    summary so the session itself stays small too; it needs an LLM call, so
+    the API runs it in the background after the response has gone out.
+    """
+
+    def __init__(self, budget=PROMPT_TOKEN_BUDGET, compact_at=COMPACT_AT_TOKENS, keep_recent=KEEP_RECENT_MESSAGES):
+        self.budget = budget
+        self.compact_at = compact_at
+        self.keep_recent = keep_recent
+        self.stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "compactions": 0}
+
+    def _split(self, history):
+        last_human = max((i for i, m in enumerate(history) if isinstance(m, HumanMessage)), default=-1)
+        pinned, body = [], []
+        for i, m in enumerate(history):
+            if is_pinned(i, m):
+                pinned.append(m)
+            # Control messages of the turn in progress are still needed
+            elif not is_control_message(m) or i > last_human:
+                body.append(m)
+        return pinned, body
+
+    def build_prompt(self, history, extra=()):
+        pinned, body = self._split(history)
+        available = self.budget - count_tokens(pinned) - count_tokens(extra)
+
+        kept = []
+        used = 0
+        for m in reversed(body):
+            cost = count_tokens([m])
+            # Always keep the newest message, even if it alone is over budget
+            if kept and used + cost > available:
+                break
+            kept.append(m)
+            used += cost
+
+        return pinned + kept[::-1] + list(extra)
+
+    def needs_compaction(self, history):
+        return count_tokens(history) > self.compact_at
+
+    async def compact(self, history, llm):
+        """
+        The compacted transcript for `history` (pinned messages, the updated
+        summary, the recent turns), or None when there is nothing to fold yet.
+        `history` itself is left alone.
+        """
+        if not self.needs_compaction(history):
+            return None
+
+        pinned, body = self._split(history)
+        body = [m for m in body if not is_control_message(m)]
+        recent = body[-self.keep_recent:]
+        old = body[:-self.keep_recent]
+        if not old:
+            return None
+
+        previous = [m for m in pinned if m.content.startswith(SUMMARY_TAG)]
+        pinned = [m for m in pinned if not m.content.startswith(SUMMARY_TAG)]
+        transcript = "\n".join(f"{type(m).__name__.replace('Message', '')}: {m.content}" for m in old)
+        prior = previous[-1].content[len(SUMMARY_TAG):].strip() if previous else "(none)"
+
+        summary_messages = [
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"PREVIOUS SUMMARY:\n{prior}\n\nTRANSCRIPT:\n{transcript}")
+        ]
+        response = await llm.ainvoke(summary_messages)
+        self.record_call("summary", summary_messages, response)
+
+        summary = SystemMessage(content=f"{SUMMARY_TAG}\n{response.content.strip()}")
+        self.stats["compactions"] += 1
+        return pinned + [summary] + recent
+
+    # --- INSTRUMENTATION ---
+
+    def record_call(self, label, prompt_messages, response=None, completion_text=None):
+        """
+        Logs token usage for one model call. Uses the provider's usage numbers
+        when the response carries them, otherwise the local estimate.
+        """
+        usage = getattr(response, "usage_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens") or count_tokens(prompt_messages)
+        if completion_text is None:
+            completion_text = response.content if response is not None else ""
+        completion_tokens = usage.get("output_tokens") or count_text_tokens(completion_text)
+
+        self.stats["calls"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += completion_tokens
+        LLM_TOKENS.inc(prompt_tokens, call=label, kind="prompt")
+        LLM_TOKENS.inc(completion_tokens, call=label, kind="completion")
+        log(f"   [TOKENS: {label}] prompt={prompt_tokens} completion={completion_tokens} messages={len(prompt_messages)}")
+        return prompt_tokens, completion_tokens
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+CACHE_DB = "scrape_cache.db"
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    Per-URL validators and extraction results from the previous scrape.
+
+    etag / last_modified drive conditional GETs; text_hash is the hash of the
+    preprocess_html output, so a page whose markup changed but whose visible
+    text did not still reuses its events instead of going back to the model.
+    """
+
+    def __init__(self, path=CACHE_DB):
+        self.path = path
+        self.local = threading.local()
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    text_hash TEXT,
+                    events TEXT,
+                    fetched_at REAL
+                )
+            """)
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, url):
+        row = self._conn().execute(
+            "SELECT etag, last_modified, text_hash, events FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "text_hash": row[2],
+            "events": json.loads(row[3]) if row[3] else [],
+        }
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry and entry["events"]:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, response, page_text_hash, events):
+        with self._conn() as conn:
+            conn.execute("""
+                INSERT INTO pages (url, etag, last_modified, text_hash, events, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag, last_modified = excluded.last_modified,
+                    text_hash = excluded.text_hash, events = excluded.events, fetched_at = excluded.fetched_at
+            """, (
+                url,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                page_text_hash,
+                json.dumps(events, ensure_ascii=False),
+                time.time()
+            ))
@@ -0,0 +1,56 @@
+import os
+import shutil
+import time
+
+# Layout under DB_PATH:
+#   CURRENT            name of the live build (swapped atomically by ingest.py)
+#   builds/<stamp>/    one complete Chroma store per ingest run
+# Without CURRENT, DB_PATH itself is the store (the original flat layout).
+CURRENT_FILE = "CURRENT"
+BUILDS_DIR = "builds"
+
+
+def resolve_active_index(db_path):
+    """
+    Directory of the index that readers should use right now.
+    """
+    try:
+        with open(os.path.join(db_path, CURRENT_FILE), "r") as f:
+            name = f.read().strip()
+    except OSError:
+        return db_path
+    return os.path.join(db_path, BUILDS_DIR, name)
+
+def is_versioned(db_path):
+    return os.path.exists(os.path.join(db_path, CURRENT_FILE))
+
+def new_build_dir(db_path):
+    """
+    Fresh build directory. It starts as a copy of the live build so an
+    incremental run only has to apply the differences.
+    """
+    name = time.strftime("%Y%m%d-%H%M%S") + f"-{time.time_ns()}"
+    build_dir = os.path.join(db_path, BUILDS_DIR, name)
+    if is_versioned(db_path):
+        shutil.copytree(resolve_active_index(db_path), build_dir)
+    else:
+        os.makedirs(build_dir)
+    return build_dir
+
+def publish_index(db_path, build_dir, keep=2):
+    """
+    Points CURRENT at build_dir in a single rename, then deletes old builds.
+    The previous build is kept so workers that still have it open can finish.
+    """
+    tmp_path = os.path.join(db_path, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(os.path.basename(build_dir))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(db_path, CURRENT_FILE))
+
+    builds_root = os.path.join(db_path, BUILDS_DIR)
+    builds = sorted(os.listdir(builds_root))
+    for name in builds[:-keep]:
+        if name != os.path.basename(build_dir):
+            shutil.rmtree(os.path.join(builds_root, name), ignore_errors=True)
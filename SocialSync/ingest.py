@@ -1,32 +1,95 @@
 import os
 import shutil
 import re
+import hashlib
 from dotenv import load_dotenv
 from langchain_community.document_loaders import TextLoader
-# CHANGED: Import OpenAI Embeddings
-from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from retrieval_cache import write_index_version
+import event_store
+from index_paths import new_build_dir, publish_index
+from lexical_index import BM25Index
+from numpy_index import NumpyIndex
+from telemetry import print_summary, span
+from embedding_providers import EMBEDDING_PROVIDER, create_embeddings, read_index_provider, write_index_provider, spec_name
 
 load_dotenv(dotenv_path="./.env")
 
-# Ensure API Key is present
-if not os.getenv("OPENAI_API_KEY"):
-    raise ValueError("ERROR: OPENAI_API_KEY not found in .env file")
-
 DATA_PATH = "./data_raw"
 DB_PATH = "./chroma_db"
+# Separate collections so tribe profiles never take event slots in a search
+EVENTS_COLLECTION = "events"
+PROFILES_COLLECTION = "profiles"
+EMBED_BATCH_SIZE = 500
 
-def ingest_data():
-    print("🔄 SOCIALSYNC: Re-indexing Memory (Dual Mode - OpenAI Powered)...")
+def document_key(metadata, text):
+    """
+    Stable id for a chunk: events use their events.db row id, profiles their 'Tribe:' line.
+    """
+    if metadata.get("source") == "event":
+        return f"event-{metadata['event_id']}"
+    identity = text.split("\n", 1)[0].strip().lower()
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+def keyed_document(text, metadata):
+    metadata = dict(metadata, content_hash=hashlib.sha256(text.encode("utf-8")).hexdigest())
+    return document_key(metadata, text), Document(page_content=text, metadata=metadata)
+
+def load_event_documents():
+    """
+    Events come straight from events.db (the scraper's single source of truth).
+    """
+    conn = event_store.connect()
+    event_store.import_text_dump(conn)
+    # Duplicates merged by dedup.py point at their canonical row and are not indexed
+    rows = conn.execute("SELECT * FROM events WHERE canonical_id IS NULL").fetchall()
+    conn.close()
+
+    events = {}
+    for row in rows:
+        doc_id, doc = keyed_document(event_store.render_event_text(row), event_store.event_row_metadata(row))
+        events[doc_id] = doc
+    print(f"   🗄️  Loaded {len(events)} events from {event_store.EVENTS_DB}.")
+    return events
+
+def sync_collection(store, docs_by_id):
+    """
+    Makes the collection match docs_by_id, embedding only new or changed chunks.
+    Returns counts of added / updated / removed / skipped documents.
+    """
+    existing = store.get(include=["metadatas"])
+    existing_hashes = {
+        doc_id: (meta or {}).get("content_hash")
+        for doc_id, meta in zip(existing["ids"], existing["metadatas"])
+    }
+
+    added = [i for i in docs_by_id if i not in existing_hashes]
+    updated = [i for i in docs_by_id if i in existing_hashes and existing_hashes[i] != docs_by_id[i].metadata["content_hash"]]
+    removed = [i for i in existing_hashes if i not in docs_by_id]
+    skipped = len(docs_by_id) - len(added) - len(updated)
+
+    if removed or updated:
+        store.delete(ids=removed + updated)
+    to_embed = added + updated
+    for start in range(0, len(to_embed), EMBED_BATCH_SIZE):
+        batch = to_embed[start:start + EMBED_BATCH_SIZE]
+        store.add_documents([docs_by_id[i] for i in batch], ids=batch)
+
+    return {"added": len(added), "updated": len(updated), "removed": len(removed), "skipped": skipped}
 
-    # 1. Clear old database
-    if os.path.exists(DB_PATH):
-        shutil.rmtree(DB_PATH)
+def ingest_data():
+    # Checked here rather than at import, so the module loads without credentials
+    if EMBEDDING_PROVIDER == "openai" and not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("ERROR: OPENAI_API_KEY not found in .env file")
+    embeddings, spec = create_embeddings()
+    print(f"🔄 SOCIALSYNC: Updating Memory (Incremental - {spec_name(spec)})...")
 
-    documents = []
+    with span("ingest.load_events"):
+        events = load_event_documents()
+    profiles = {}
     
-    # 2. Iterate through all files in data_raw
+    # 1. Profiles still live as text in data_raw
     if not os.path.exists(DATA_PATH):
         print(f"❌ Error: Directory '{DATA_PATH}' not found.")
         return
@@ -34,48 +97,70 @@ def ingest_data():
     for filename in os.listdir(DATA_PATH):
         file_path = os.path.join(DATA_PATH, filename)
         
-        # Skip system files
-        if not filename.endswith(".txt"): continue
+        # Skip system files and anything that isn't a profile list
+        if not filename.endswith(".txt") or "profiles" not in filename: continue
 
         print(f"   📂 Processing: {filename}...")
         
         with open(file_path, "r", encoding="utf-8") as f:
             raw_text = f.read()
 
-        # MODE A: PROFILES (Regex Split)
-        if "profiles" in filename:
-            raw_chunks = re.split(r'(?=Tribe:)', raw_text)
-            for chunk in raw_chunks:
-                if "Tribe:" in chunk and "Next Question:" in chunk:
-                    documents.append(Document(page_content=chunk.strip(), metadata={"source": "profile"}))
-            print(f"     -> Extracted {len(raw_chunks)} profiles.")
-
-        # MODE B: EVENTS (Standard Split)
-        else:
-            # Split by dashed line
-            raw_chunks = raw_text.split("------------------------------------------------")
-            for chunk in raw_chunks:
-                if "Event:" in chunk:
-                    documents.append(Document(page_content=chunk.strip(), metadata={"source": "event"}))
-            print(f"     -> Extracted {len(raw_chunks)} events.")
-
-    # 3. Save to Vector DB
-    if not documents:
+        # Regex Split
+        raw_chunks = re.split(r'(?=Tribe:)', raw_text)
+        for chunk in raw_chunks:
+            if "Tribe:" in chunk and "Next Question:" in chunk:
+                doc_id, doc = keyed_document(chunk.strip(), {"source": "profile"})
+                profiles[doc_id] = doc
+        print(f"     -> Extracted {len(raw_chunks)} profiles.")
+
+    if not events:
         print("❌ Error: No valid data found.")
         return
 
-    print(f"💾 Saving {len(documents)} total memories to Database...")
-    
-    # CHANGED: Using OpenAI Model
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    
-    Chroma.from_documents(
-        documents=documents, 
-        embedding=embeddings, 
-        persist_directory=DB_PATH
-    )
-    
+    # 2. Build aside: copy the live index and apply only the differences to the copy
+    os.makedirs(DB_PATH, exist_ok=True)
+    build_dir = new_build_dir(DB_PATH)
+    print(f"💾 Syncing {len(events)} events and {len(profiles)} profiles into {build_dir}...")
+
+    # Vectors from another provider can't be reused: start the copy from empty collections.
+    # A first build starts empty anyway (new_build_dir only copies an existing live build).
+    previous = read_index_provider(build_dir) if os.listdir(build_dir) else spec
+    if previous != spec:
+        print(f"   🔁 Provider changed ({spec_name(previous)} -> {spec_name(spec)}), re-embedding everything.")
+        for name in (EVENTS_COLLECTION, PROFILES_COLLECTION):
+            Chroma(collection_name=name, persist_directory=build_dir).delete_collection()
+
+    try:
+        vector_store = Chroma(collection_name=EVENTS_COLLECTION, embedding_function=embeddings, persist_directory=build_dir)
+        profile_store = Chroma(collection_name=PROFILES_COLLECTION, embedding_function=embeddings, persist_directory=build_dir)
+        report = {}
+        with span("ingest.sync_events"):
+            report["events"] = sync_collection(vector_store, events)
+        with span("ingest.sync_profiles"):
+            report["profiles"] = sync_collection(profile_store, profiles)
+        # Keyword side of hybrid retrieval; cheap enough to rebuild in full every run
+        with span("ingest.bm25"):
+            BM25Index.build(events.values()).save(build_dir)
+        # Matrix for VECTOR_ENGINE=numpy, straight from the vectors Chroma now holds
+        with span("ingest.numpy_matrix"):
+            NumpyIndex.from_chroma(vector_store).save(build_dir)
+        # Tells running API workers to drop their cached retrieval results
+        write_index_version(build_dir)
+        write_index_provider(build_dir, spec)
+    except Exception:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    # 3. Publish: readers switch to the new build in one atomic rename
+    with span("ingest.publish"):
+        publish_index(DB_PATH, build_dir)
+
+    for name, counts in report.items():
+        print(f"   📊 {name}: +{counts['added']} added, ~{counts['updated']} updated, "
+              f"-{counts['removed']} removed, ={counts['skipped']} skipped")
+    print_summary()
     print("✅ SOCIALSYNC: Indexing Complete.")
+    return report
 
 if __name__ == "__main__":
     ingest_data()
\ No newline at end of file
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+import numpy as np
+from event_store import fold_text
+from telemetry import INTENT_DECISIONS
+
+# Small CPU-only classifier for the routing questions that used to cost an LLM call:
+#   taste      the message says something about the user's tastes or mood
+#   confirm    the user picked one of the events they were shown
+#   logistics  the message is only about time, place or budget
+# One logistic regression per intent over hashed words and bigrams, trained on
+# data_eval/intent_examples.json when first used (tens of ms). Callers only act on
+# a confident answer; anything in between goes to the LLM as before.
+# Check accuracy and coverage with eval_intents.py after editing the examples.
+
+INTENT_EXAMPLES = os.getenv("INTENT_EXAMPLES", "data_eval/intent_examples.json")
+# A decision is taken locally when the winning side has at least this probability
+INTENT_CONFIDENCE = float(os.getenv("INTENT_CONFIDENCE", 0.8))
+INTENTS = ("taste", "confirm", "logistics")
+FEATURE_DIMENSIONS = 4096
+TRAINING_STEPS = 400
+LEARNING_RATE = 2.0
+L2_PENALTY = 1e-3
+
+
+def text_features(text):
+    """
+    Folded words, word bigrams, the first word and a question marker. Punctuation
+    is otherwise dropped, but "perfect" and "perfect?" mean different things here.
+    """
+    words = fold_text(text).split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if words:
+        features.append(f"^{words[0]}")
+    if "?" in text:
+        features.append("<question>")
+    if len(words) <= 2:
+        features.append("<short>")
+    return features
+
+@lru_cache(maxsize=65536)
+def _bucket(feature):
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little") % FEATURE_DIMENSIONS
+
+def feature_buckets(text):
+    return sorted({_bucket(f) for f in text_features(text)})
+
+def load_examples(path=INTENT_EXAMPLES):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class IntentClassifier:
+    """
+    weights: (intents, FEATURE_DIMENSIONS), bias: (intents,). Binary features, so
+    scoring a message is a sum over its few buckets, not a matrix product.
+    `vocabulary` holds the folded words seen in training.
+    """
+
+    def __init__(self, weights, bias, vocabulary, confidence=INTENT_CONFIDENCE):
+        self.weights = weights
+        self.bias = bias
+        self.vocabulary = vocabulary
+        self.confidence = confidence
+
+    @classmethod
+    def train(cls, examples, confidence=INTENT_CONFIDENCE):
+        features = np.zeros((len(examples), FEATURE_DIMENSIONS), dtype=np.float32)
+        for row, example in enumerate(examples):
+            features[row, feature_buckets(example["text"])] = 1.0
+        targets = np.array([[intent in e["labels"] for intent in INTENTS] for e in examples], dtype=np.float32)
+
+        # Full-batch gradient descent over the buckets that actually occur;
+        # the rest keep a zero weight
+        used = np.flatnonzero(features.any(axis=0))
+        features = features[:, used]
+        weights = np.zeros((len(used), len(INTENTS)), dtype=np.float32)
+        bias = np.zeros(len(INTENTS), dtype=np.float32)
+        for _ in range(TRAINING_STEPS):
+            probabilities = 1.0 / (1.0 + np.exp(-(features @ weights + bias)))
+            error = (probabilities - targets) / len(examples)
+            weights -= LEARNING_RATE * (features.T @ error + L2_PENALTY * weights)
+            bias -= LEARNING_RATE * error.sum(axis=0)
+
+        full_weights = np.zeros((len(INTENTS), FEATURE_DIMENSIONS), dtype=np.float32)
+        full_weights[:, used] = weights.T
+        vocabulary = {w for e in examples for w in fold_text(e["text"]).split()}
+        return cls(full_weights, bias, vocabulary, confidence)
+
+    def probabilities(self, text):
+        buckets = feature_buckets(text)
+        scores = self.bias + self.weights[:, buckets].sum(axis=1)
+        return dict(zip(INTENTS, (1.0 / (1.0 + np.exp(-scores))).tolist()))
+
+    def decide(self, intent, text, confidence=None):
+        """
+        True / False when confident, None when the LLM should decide.
+
+        Words the model never saw score zero, so an unfamiliar message ("velvet")
+        looks like a confident no; a no is only trusted when every word is known.
+        """
+        confidence = confidence or self.confidence
+        p = self.probabilities(text)[intent]
+        if p >= confidence:
+            return True
+        if p <= 1.0 - confidence and set(fold_text(text).split()) <= self.vocabulary:
+            return False
+        return None
+
+    def taste_signal(self, messages):
+        """
+        Local answer to the profile worker's vibe check over a batch of messages:
+        True as soon as one message confidently carries taste, False when every
+        message is confidently taste-free, None otherwise. A confidently
+        logistics-only message that leans towards no taste counts as taste-free.
+        """
+        unsure = False
+        for message in messages:
+            verdict = self.decide("taste", message)
+            if verdict:
+                return True
+            if verdict is None and not (self.decide("logistics", message) and self.probabilities(message)["taste"] < 0.5):
+                unsure = True
+        return None if unsure else False
+
+@lru_cache(maxsize=1)
+def get_intent_classifier():
+    """
+    The shared classifier, trained on first use. None when the fixture is missing,
+    in which case every routing decision falls back to the LLM.
+    """
+    try:
+        return IntentClassifier.train(load_examples())
+    except FileNotFoundError:
+        print(f"⚠️ SOCIALSYNC: {INTENT_EXAMPLES} not found, intent routing stays on the LLM")
+        return None
+
+def record_decision(intent, verdict):
+    INTENT_DECISIONS.inc(intent=intent, source="llm" if verdict is None else "local")
@@ -0,0 +1,107 @@
+import heapq
+import json
+import math
+import os
+from collections import Counter, defaultdict
+from event_store import fold_text
+from event_metadata import matches_filter
+
+BM25_FILE = "bm25.json"
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Standard RRF damping constant: a document's fused score is sum(1 / (RRF_K + rank))
+RRF_K = 60
+# Metadata kept per document so the same `where` clause as Chroma can be applied
+FILTER_FIELDS = ("event_id", "date_ts", "price", "category")
+
+
+def tokenize(text):
+    """
+    Folded word tokens, so 'Expozitie', 'Expoziție' and 'EXPOZIŢIE' are the same term.
+    """
+    return [t for t in fold_text(text).split() if len(t) > 1]
+
+
+class BM25Index:
+    """
+    In-process inverted index over the event documents (Okapi BM25).
+
+    ingest.py builds it next to the Chroma collection and saves it as
+    bm25.json in the build directory; the API loads it with the build.
+    """
+
+    def __init__(self, doc_ids, lengths, postings, metadata):
+        self.doc_ids = doc_ids          # position -> event_id
+        self.lengths = lengths          # position -> token count
+        self.postings = postings        # term -> [[position, term frequency], ...]
+        self.metadata = metadata        # position -> {field: value} for FILTER_FIELDS
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        self.idf = {
+            term: math.log(1 + (len(doc_ids) - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in postings.items()
+        }
+
+    @classmethod
+    def build(cls, docs):
+        """
+        docs: iterable of langchain Documents carrying an event_id in their metadata.
+        """
+        doc_ids, lengths, metadata = [], [], []
+        postings = defaultdict(list)
+        for position, doc in enumerate(docs):
+            tokens = tokenize(doc.page_content)
+            for term, tf in Counter(tokens).items():
+                postings[term].append([position, tf])
+            doc_ids.append(doc.metadata["event_id"])
+            lengths.append(len(tokens))
+            metadata.append({field: doc.metadata.get(field) for field in FILTER_FIELDS})
+        return cls(doc_ids, lengths, dict(postings), metadata)
+
+    def save(self, db_path):
+        with open(os.path.join(db_path, BM25_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "doc_ids": self.doc_ids,
+                "lengths": self.lengths,
+                "postings": self.postings,
+                "metadata": self.metadata,
+            }, f)
+
+    @classmethod
+    def load(cls, db_path):
+        """
+        The index saved in db_path, or None for builds made before BM25 existed.
+        """
+        try:
+            with open(os.path.join(db_path, BM25_FILE), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except OSError:
+            return None
+        return cls(data["doc_ids"], data["lengths"], data["postings"], data["metadata"])
+
+    def search(self, query, k=10, where=None):
+        """
+        Top-k event ids for the query, best first, restricted to documents matching `where`.
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for position, tf in self.postings[term]:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[position] / self.avg_length)
+                scores[position] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        if where is not None:
+            scores = {p: s for p, s in scores.items() if matches_filter(self.metadata[p], where)}
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [self.doc_ids[position] for position, _ in best]
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Merges several best-first id lists into one; ids ranked well by more lists come first.
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -1,12 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
-from rag_logic import SocialSyncAgent
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from rag_logic import cache_stats, get_llm, readiness, warm_up
+from profile_worker import ProfileUpdater
+from streaming import CommandStripper, sse, strip_commands
+from session_store import create_session_store, new_session
+from user_store import UserStore
+from history import HistoryManager
+from event_metadata import parse_search_filters
+from event_store import EventRepository, event_card_fields
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+import asyncio
 import json
 import os
-from email_service import send_event_email
+import random
+import time
+import traceback
+from email_service import render_event_email
+from email_outbox import EmailOutbox, SMTPPool, OutboxSender
+from intent_classifier import get_intent_classifier, record_decision
+from telemetry import HTTP_SECONDS, accept_trace_id, log, register_collector, render_prometheus, span, trace_id_var
 
 app = FastAPI()
 
@@ -19,16 +34,9 @@ app.add_middleware(
 )
 
 # --- DATABASE ---
-DB_FILE = "users.json"
-users_db = {}
-
-if os.path.exists(DB_FILE):
-    with open(DB_FILE, "r") as f:
-        users_db = json.load(f)
-
-def save_db():
-    with open(DB_FILE, "w") as f:
-        json.dump(users_db, f, indent=2)
+# SQLite user repository; users.json is imported once on first start
+users = UserStore()
+users.migrate_from_json()
 
 # --- MODELS ---
 
@@ -60,32 +68,113 @@ class EmailRequest(BaseModel):
     email: str
     event: EventData
 
+# --- EVENTS (read side of events.db) ---
+event_repo = EventRepository()
+
 # --- SESSION STORE ---
-sessions = {}
+# Bounded (LRU + idle TTL) and serialized so workers share sessions; see session_store.py
+sessions = create_session_store()
+
+# --- CONTEXT WINDOW ---
+history_manager = HistoryManager()
+compacting_sessions = set()
+# Strong references to fire-and-forget tasks, so they aren't garbage collected mid-run
+background_tasks = set()
+
+# --- LOCAL INTENT ROUTING ---
+# Answers "did they pick an event?" and the vibe check without a model call when sure
+intent_classifier = get_intent_classifier()
+
+# --- BACKGROUND PROFILE UPDATES ---
+async def store_profile(email, new_vibe):
+    await users.aupdate_profile(email, new_vibe)
+
+profile_updater = ProfileUpdater(get_llm, on_update=store_profile, classifier=intent_classifier)
+
+# --- EMAIL OUTBOX ---
+# /send-event-email only enqueues; the sender drains outbox.db over pooled SMTP connections
+outbox = EmailOutbox()
+email_sender = OutboxSender(outbox, SMTPPool())
+
+@register_collector
+def outbox_metrics():
+    return [("socialsync_outbox_messages", "gauge", "Outbox messages by status.",
+             [({"status": status}, count) for status, count in outbox.counts().items()])]
+
+# --- TRACING ---
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # One id per request, shown in every log() line of the turn and returned to the client
+    trace_id = accept_trace_id(request.headers.get("X-Request-ID"))
+    trace_id_var.set(trace_id)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    except Exception:
+        # Answer the 500 here so the client still gets the trace id to quote
+        log(f"❌ Unhandled error on {request.method} {request.url.path}:\n{traceback.format_exc()}")
+        response = JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
+    finally:
+        # Route template rather than raw path, so /email-status/{message_id} stays one series
+        route = request.scope.get("route")
+        HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                             path=route.path if route else "unmatched", status=status)
+    response.headers["X-Trace-Id"] = trace_id
+    return response
+
+# --- STARTUP ---
+# Set WARM_UP=0 to skip the warm-up and build everything on the first request instead
+WARM_UP = os.getenv("WARM_UP", "1") != "0"
+# A failed warm-up (index not built yet, provider down) is retried, backing off up to the max
+WARM_UP_RETRY_SECONDS = float(os.getenv("WARM_UP_RETRY_SECONDS", 5))
+WARM_UP_RETRY_MAX_SECONDS = float(os.getenv("WARM_UP_RETRY_MAX_SECONDS", 300))
+
+async def warm_up_until_ready():
+    delay = WARM_UP_RETRY_SECONDS
+    while not (await asyncio.to_thread(warm_up))["ready"]:
+        log(f"🔁 Retrying warm-up in {delay:g}s")
+        await asyncio.sleep(delay)
+        # A user search may have succeeded lazily in the meantime
+        if readiness()["ready"]:
+            return
+        delay = min(delay * 2, WARM_UP_RETRY_MAX_SECONDS)
+
+@app.on_event("startup")
+async def start_background_workers():
+    profile_updater.start()
+    email_sender.start()
+    if WARM_UP:
+        # Runs behind the server: /healthz answers at once, /readyz turns 200 when this is done
+        app.state.warm_up = asyncio.create_task(warm_up_until_ready())
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    if WARM_UP:
+        app.state.warm_up.cancel()
+    await profile_updater.stop()
+    await email_sender.stop()
 
 # --- AUTH ENDPOINTS ---
 @app.post("/register")
 async def register(req: AuthRequest):
-    if req.email in users_db:
+    name = req.name or req.email.split("@")[0]
+    if not await users.acreate(req.email, req.password, name):
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    users_db[req.email] = {
-        "password": req.password,
-        "name": req.name or req.email.split("@")[0], 
-        "profile": "" 
-    }
-    save_db()
-    
     return {
         "status": "success", 
         "email": req.email, 
-        "name": users_db[req.email]["name"],
-        "profile": ""
+        "name": name,
+        "profile": "",
+        "profile_version": 0,
+        "token": await users.aissue_token(req.email)
     }
 
 @app.post("/login")
 async def login(req: AuthRequest):
-    user = users_db.get(req.email)
+    user = await users.aget(req.email) if req.email else None
     if not user or user["password"] != req.password:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
@@ -93,60 +182,19 @@ async def login(req: AuthRequest):
         "status": "success", 
         "email": req.email, 
         "name": user["name"], 
-        "profile": user["profile"]
+        "profile": user["profile"],
+        "profile_version": user["profile_version"],
+        "token": await users.aissue_token(req.email)
     }
 
 # --- CHAT ENDPOINTS ---
 
-def parse_event_text(raw_text):
-    lines = raw_text.split('\n')
-    info = {}
-    for line in lines:
-        if ": " in line:
-            key, val = line.split(": ", 1)
-            info[key.strip()] = val.strip()
-    return EventData(
-        title=info.get("Event", "Unknown"),
-        date=info.get("Date", "TBD"),
-        location=info.get("Location", "Check Link"),
-        cost=info.get("Cost", "Free"),
-        description=info.get("Description", ""),
-        url=info.get("Source", "#")
-    )
-
 def strip_command_from_text(text):
-    lines = text.split('\n')
-    clean_lines = [line for line in lines if "SEARCH_ACTION" not in line.upper()]
-    return "\n".join(clean_lines).strip()
+    # Same rule as the streaming endpoint's CommandStripper
+    return strip_commands(text)
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(req: ChatRequest):
-    # Initialize Session
-    if req.session_id not in sessions:
-        agent = SocialSyncAgent()
-        
-        # --- INJECT EXISTING VIBE ---
-        if req.email and req.email in users_db:
-            user_profile = users_db[req.email]["profile"]
-            if user_profile:
-                # We inject this as soft context
-                agent.chat_history.append(SystemMessage(content=f"""
-                [USER CONTEXT]
-                The user has previously enjoyed: "{user_profile}".
-                Use this to guide your tone, but don't obsess over it.
-                """))
-        
-        sessions[req.session_id] = {
-            "agent": agent,
-            "seen_events": set()
-        }
-    
-    session_data = sessions[req.session_id]
-    agent = session_data["agent"]
-    agent.chat_history.append(HumanMessage(content=req.message))
-    
-    # --- RESTORED CHILL PERSONA (With Stop Condition) ---
-    reminder_msg = SystemMessage(content="""
+# --- RESTORED CHILL PERSONA (With Stop Condition) ---
+PERSONA_REMINDER = """
     [PERSONA INSTRUCTIONS]
     You are SocialSync. Your goal is to be a helpful, excited friend who finds events.
     
@@ -162,140 +210,350 @@ async def chat_endpoint(req: ChatRequest):
     3. DO NOT output 'SEARCH_ACTION'.
     4. DO NOT offer more options unless they explicitly ask "what else?".
     Just say something like: "Awesome choice! Have a blast! 🎆" and stop.
-    """)
+    """
+
+CARDS_PER_TURN = 2
+OUT_OF_EVENTS_TEXT = "I've run out of new events matching that vibe! Should we try a different category?"
+# What the persona's stop condition asks for, sent without an LLM call
+CELEBRATION_TEXTS = [
+    "Awesome choice! Have a blast! 🎆",
+    "Great pick! Enjoy every minute of it! 🥳",
+    "Love it! Have an amazing time! 🎉",
+]
+
+async def get_session(req):
+    with span("session.load"):
+        session_data = await sessions.aget(req.session_id)
+
+    # Initialize Session
+    if session_data is None:
+        session_data = new_session()
+        agent = session_data["agent"]
+        
+        # --- INJECT EXISTING VIBE ---
+        user = await users.aget(req.email) if req.email else None
+        if user:
+            user_profile = user["profile"]
+            if user_profile:
+                # We inject this as soft context
+                agent.chat_history.append(SystemMessage(content=f"""
+                [USER CONTEXT]
+                The user has previously enjoyed: "{user_profile}".
+                Use this to guide your tone, but don't obsess over it.
+                """))
     
-    agent.chat_history.append(reminder_msg)
+    return session_data
+
+def build_turn_prompt(agent):
+    # The reminder is only sent with this call, never stored, to save context window
+    return history_manager.build_prompt(agent.chat_history, extra=[SystemMessage(content=PERSONA_REMINDER)])
+
+def confirmed_choice(session_data, message):
+    """
+    True when the user picked one of the cards already shown and the local
+    classifier is sure of it. Anything less confident goes through the LLM.
+    """
+    if intent_classifier is None or not session_data["seen_events"]:
+        return False
+    confirmed = intent_classifier.decide("confirm", message)
+    record_decision("confirm", True if confirmed else None)
+    return bool(confirmed)
+
+def refined_query(session_data, message):
+    """
+    After a search, a message the local classifier is sure only changes time,
+    place or budget ("Saturday night", "under 100 lei") re-runs that search with
+    the new constraint, without a reply call. None leaves the decision to the LLM.
+    """
+    if intent_classifier is None or not session_data["last_query"]:
+        return None
+    logistics = intent_classifier.decide("logistics", message)
+    if logistics and intent_classifier.probabilities(message)["taste"] >= 0.5:
+        # Also a new vibe ("jazz tomorrow"): the model writes that query
+        logistics = None
+    record_decision("logistics", True if logistics else None)
+    # Newest constraint first, so its price cap wins over the old one
+    return f"{message} {session_data['last_query']}" if logistics else None
+
+def celebrate(session_data):
+    text = random.choice(CELEBRATION_TEXTS)
+    session_data["agent"].chat_history.append(AIMessage(content=text))
+    return text
+
+def is_mission_complete(ai_text):
+    # Detect if AI is celebrating a successful choice
+    upper = ai_text.upper()
+    is_celebrating = "HAVE" in upper or "GREAT" in upper or "ENJOY" in upper or "AWESOME" in upper
+    is_offering_more = "SEARCH_ACTION" in upper or "MORE" in upper or "?" in ai_text
+    return is_celebrating and not is_offering_more
+
+def extract_search_query(ai_text):
+    if "SEARCH_ACTION" not in ai_text.upper():
+        return None
+    clean_text_for_parsing = ai_text.replace("**SEARCH_ACTION:**", "SEARCH_ACTION:")
+    if "SEARCH_ACTION:" in clean_text_for_parsing:
+        return clean_text_for_parsing.split("SEARCH_ACTION:")[1].strip()
+    return clean_text_for_parsing.replace("SEARCH_ACTION", "").strip()
+
+async def find_new_events(session_data, query):
+    agent = session_data["agent"]
+    seen = session_data["seen_events"]
+    session_data["last_query"] = query
+    filters = parse_search_filters(query)
+    with span("retrieval"):
+        new_ids = await agent.aretrieve_new_events(query, count=CARDS_PER_TURN, seen=seen, **filters)
+        if not new_ids and filters:
+            # Price/category read from the query were too strict; keep only the upcoming filter
+            new_ids = await agent.aretrieve_new_events(query, count=CARDS_PER_TURN, seen=seen)
     
-    ai_response = agent.llm.invoke(agent.chat_history)
-    ai_text = ai_response.content
+    # One batched lookup for the cards instead of re-parsing chunk text
+    with span("cards.hydrate"):
+        rows = await event_repo.aget_many(new_ids)
     
-    # Remove reminder to save context window
-    if agent.chat_history and agent.chat_history[-1] == reminder_msg:
-        agent.chat_history.pop()
+    for row in rows:
+        session_data["seen_events"][row["id"]] = None
+
+    return [EventData(**event_card_fields(row)) for row in rows]
+
+def prepare_follow_up(session_data):
+    agent = session_data["agent"]
+    agent.chat_history.append(AIMessage(content="SEARCH_EXECUTED"))
+    
+    if len(session_data["seen_events"]) > 2:
+        sys_msg = "SYSTEM: You just showed 2 MORE events. Briefly ask if these are better."
+    else:
+        sys_msg = "SYSTEM: You just showed the first 2 options. Briefly ask for thoughts."
+    
+    agent.chat_history.append(SystemMessage(content=sys_msg))
+
+async def finish_turn(req, session_data):
+    agent = session_data["agent"]
+
+    # --- INCREMENTAL VIBE ASSESSMENT (BACKGROUND) ---
+    # Queued per email and coalesced; clients poll /profile-updates for the result.
+    if req.email and await users.aexists(req.email):
+        profile_updater.submit(req.email, req.message, history_manager.build_prompt(agent.chat_history))
+
+    with span("session.save"):
+        await sessions.aput(req.session_id, session_data)
+
+    # Fold old turns into the running summary once the transcript gets long. That
+    # takes an LLM call, so it runs after the response instead of in front of it.
+    if history_manager.needs_compaction(agent.chat_history) and req.session_id not in compacting_sessions:
+        compacting_sessions.add(req.session_id)
+        task = asyncio.create_task(compact_session(req.session_id, list(agent.chat_history)))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+async def compact_session(session_id, history):
+    """
+    Summarizes a snapshot of the transcript and splices the result into the
+    stored session. Turns that finished meanwhile are kept; if the session
+    changed in any other way, or the LLM call fails, the full transcript stays.
+    """
+    try:
+        with span("history.compact"):
+            compacted = await history_manager.compact(history, get_llm())
+        if compacted is None:
+            return
+        session_data = await sessions.aget(session_id)
+        if session_data is None:
+            return
+        agent = session_data["agent"]
+        if agent.chat_history[:len(history)] != history:
+            return
+        agent.chat_history = compacted + agent.chat_history[len(history):]
+        await sessions.aput(session_id, session_data)
+    except Exception as e:
+        log(f"⚠️ History compaction failed, keeping the full transcript: {e}")
+    finally:
+        compacting_sessions.discard(session_id)
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(req: ChatRequest):
+    session_data = await get_session(req)
+    agent = session_data["agent"]
+    agent.chat_history.append(HumanMessage(content=req.message))
+
+    if confirmed_choice(session_data, req.message):
+        text = celebrate(session_data)
+        await finish_turn(req, session_data)
+        return ChatResponse(text=text, events=[], mission_complete=True)
+
+    ai_text = ""
+    query = refined_query(session_data, req.message)
+    if query is None:
+        prompt = build_turn_prompt(agent)
+        with span("llm.reply"):
+            ai_response = await agent.llm.ainvoke(prompt)
+        history_manager.record_call("reply", prompt, ai_response)
+        ai_text = ai_response.content
+        query = extract_search_query(ai_text)
 
     events_to_return = []
     final_text = ai_text
     mission_complete = False
-    new_vibe_detected = None 
 
     # --- 0. SATISFACTION CHECK (PRE-FILTER) ---
-    # Detect if AI is celebrating a successful choice
-    is_celebrating = "HAVE" in ai_text.upper() or "GREAT" in ai_text.upper() or "ENJOY" in ai_text.upper() or "AWESOME" in ai_text.upper()
-    is_offering_more = "SEARCH_ACTION" in ai_text.upper() or "MORE" in ai_text.upper() or "?" in ai_text
-
-    if is_celebrating and not is_offering_more:
+    if is_mission_complete(ai_text):
          mission_complete = True
 
     # --- MAIN LOGIC LOOP ---
-    elif "SEARCH_ACTION" in ai_text.upper():
-        clean_text_for_parsing = ai_text.replace("**SEARCH_ACTION:**", "SEARCH_ACTION:")
-        if "SEARCH_ACTION:" in clean_text_for_parsing:
-            query = clean_text_for_parsing.split("SEARCH_ACTION:")[1].strip()
-        else:
-            query = clean_text_for_parsing.replace("SEARCH_ACTION", "").strip()
-        
-        raw_events = agent.retrieve_events(query)
-        
-        new_events = []
-        for raw in raw_events:
-            if raw not in session_data["seen_events"]:
-                new_events.append(raw)
-        
-        events_to_show = new_events[:2]
-        
-        for ev in events_to_show:
-            session_data["seen_events"].add(ev)
-
-        events_to_return = [parse_event_text(e) for e in events_to_show]
+    elif query is not None:
+        events_to_return = await find_new_events(session_data, query)
         
         if events_to_return:
-            agent.chat_history.append(AIMessage(content="SEARCH_EXECUTED"))
-            
-            if len(session_data["seen_events"]) > 2:
-                sys_msg = "SYSTEM: You just showed 2 MORE events. Briefly ask if these are better."
-            else:
-                sys_msg = "SYSTEM: You just showed the first 2 options. Briefly ask for thoughts."
-            
-            agent.chat_history.append(SystemMessage(content=sys_msg))
-            follow_up = agent.llm.invoke(agent.chat_history)
+            prepare_follow_up(session_data)
+            follow_prompt = history_manager.build_prompt(agent.chat_history)
+            with span("llm.follow_up"):
+                follow_up = await agent.llm.ainvoke(follow_prompt)
+            history_manager.record_call("follow_up", follow_prompt, follow_up)
             final_text = follow_up.content
             agent.chat_history.append(follow_up)
             
             mission_complete = True
             
         else:
-            final_text = "I've run out of new events matching that vibe! Should we try a different category?"
+            final_text = OUT_OF_EVENTS_TEXT
 
     else:
         # Standard conversation response
         agent.chat_history.append(ai_response)
         final_text = ai_text
 
-    # --- AGGRESSIVE INCREMENTAL VIBE ASSESSMENT ---
-    # This runs on EVERY TURN to capture updates immediately.
-    if req.email and req.email in users_db:
-        try:
-            # Step A: Filter for relevant info
-            # We explicitly ask it to ignore logistics to keep the vibe pure.
-            vibe_check_prompt = SystemMessage(content=f"""
-            [SYSTEM ANALYSIS]
-            Analyze the USER'S last message: "{req.message}"
-            
-            Does this message provide ANY hint about their personality, tastes, or mood?
-            (e.g., "I like jazz", "Something chill", "Not a fan of crowds", "I want to dance")
-            
-            Ignore purely logistic messages like "NYC" or "Tomorrow".
-            
-            Answer ONLY "YES" or "NO".
-            """)
-            
-            # Check context
-            check_messages = agent.chat_history[:-1] + [vibe_check_prompt] 
-            check_response = agent.llm.invoke(check_messages)
-            
-            should_update = "YES" in check_response.content.strip().upper()
-
-            if should_update:
-                # Step B: Create Database Entry
-                assessment_prompt = SystemMessage(content="""
-                [ACTION: DATABASE ENTRY]
-                Role: DATA ANALYST (Not a chatbot).
-                Task: Update the user's "Taste Profile" based on the conversation so far.
-                
-                RULES:
-                1. Write 1 concise sentence summarizing their general tastes/personality.
-                2. DO NOT include Location/Time/Budget.
-                3. DO NOT use conversational language. Be factual.
-                
-                Example: "Enjoys low-key acoustic music and outdoor markets."
-                """)
-                
-                agent.chat_history.append(assessment_prompt)
-                summary_response = agent.llm.invoke(agent.chat_history)
-                new_vibe_detected = summary_response.content.replace('"', '').strip()
-                
-                users_db[req.email]["profile"] = new_vibe_detected
-                save_db()
-                
-                agent.chat_history.pop() 
-                print(f"Profile Updated: {new_vibe_detected}")
-
-        except Exception as e:
-            print(f"Failed to update vibe: {e}")
+    await finish_turn(req, session_data)
 
     final_text = strip_command_from_text(final_text)
 
     return ChatResponse(
         text=final_text, 
         events=events_to_return, 
-        mission_complete=mission_complete,
-        new_vibe=new_vibe_detected 
+        mission_complete=mission_complete
     )
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest):
+    """
+    Streaming variant of /chat (Server-Sent Events).
+
+    Frames, in order:
+      token   {"segment": "reply" | "follow_up", "text": ...}  as the model writes
+      events  {"events": [...]}                                as soon as retrieval returns
+      done    {"mission_complete": bool}
+    SEARCH_ACTION lines are stripped on the fly and never sent.
+    """
+    session_data = await get_session(req)
+    agent = session_data["agent"]
+    agent.chat_history.append(HumanMessage(content=req.message))
+
+    async def stream_segment(messages, segment, parts):
+        # Raw chunks are collected in `parts`; only stripped text goes to the client
+        stripper = CommandStripper()
+        # Includes the time the client takes to read the frames, like the user perceives it
+        with span(f"llm.{segment}"):
+            async for chunk in agent.llm.astream(messages):
+                parts.append(chunk.content)
+                text = stripper.feed(chunk.content)
+                if text:
+                    yield sse("token", {"segment": segment, "text": text})
+        history_manager.record_call(segment, messages, completion_text="".join(parts))
+        tail = stripper.flush()
+        if tail:
+            yield sse("token", {"segment": segment, "text": tail})
+
+    async def event_stream():
+        if confirmed_choice(session_data, req.message):
+            yield sse("token", {"segment": "reply", "text": celebrate(session_data)})
+            await finish_turn(req, session_data)
+            yield sse("done", {"mission_complete": True})
+            return
+
+        ai_text = ""
+        query = refined_query(session_data, req.message)
+        if query is None:
+            parts = []
+            async for frame in stream_segment(build_turn_prompt(agent), "reply", parts):
+                yield frame
+            ai_text = "".join(parts)
+            query = extract_search_query(ai_text)
+
+        mission_complete = False
+
+        if is_mission_complete(ai_text):
+            mission_complete = True
+
+        elif query is not None:
+            events_to_return = await find_new_events(session_data, query)
+            yield sse("events", {"events": [e.dict() for e in events_to_return]})
+
+            if events_to_return:
+                prepare_follow_up(session_data)
+                follow_parts = []
+                async for frame in stream_segment(history_manager.build_prompt(agent.chat_history), "follow_up", follow_parts):
+                    yield frame
+                agent.chat_history.append(AIMessage(content="".join(follow_parts)))
+                mission_complete = True
+            else:
+                yield sse("token", {"segment": "follow_up", "text": OUT_OF_EVENTS_TEXT})
+
+        else:
+            agent.chat_history.append(AIMessage(content=ai_text))
+
+        await finish_turn(req, session_data)
+        yield sse("done", {"mission_complete": mission_complete})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/profile-updates")
+async def profile_updates(token: str, since: int = 0):
+    """
+    Polled by the client after a chat turn with the token /login or /register
+    returned. Returns the user's stored profile and whether it is newer than `since`.
+    """
+    update = await users.aprofile_by_token(token)
+    if update is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return {
+        "profile": update["profile"],
+        "version": update["version"],
+        "changed": update["version"] > since
+    }
+
+@app.get("/healthz")
+async def healthz():
+    """
+    Liveness: the process is up and serving.
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness: 200 once warm-up (or a lazy first user search) has loaded the index
+    and run a search, 503 before that or while a failed warm-up is being retried.
+    """
+    state = readiness()
+    return JSONResponse(dict(state, status="ready" if state["ready"] else "not ready"), status_code=200 if state["ready"] else 503)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Stage and request latency histograms, LLM token counters and cache/outbox
+    gauges in the Prometheus text format (this process only).
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/cache")
+async def retrieval_cache_metrics():
+    return cache_stats()
+
 @app.post("/reset")
 async def reset_chat(req: ChatRequest):
-    if req.session_id in sessions:
-        del sessions[req.session_id]
+    await sessions.adelete(req.session_id)
     return {"status": "reset"}
 
 @app.post("/send-event-email")
@@ -303,12 +561,23 @@ async def send_event_email_endpoint(req: EmailRequest):
     if not req.email or "@" not in req.email:
          raise HTTPException(status_code=400, detail="Valid email required")
     
-    success, message = send_event_email(req.email, req.event.dict())
-    
-    if not success:
-        raise HTTPException(status_code=500, detail=f"Failed to send email: {message}")
+    subject, html_content = render_event_email(req.event.dict())
+    message_id = await outbox.aenqueue(req.email, subject, html_content)
+    email_sender.wake()
         
-    return {"status": "success", "message": "Ticket info sent to your inbox!"}
+    # An opaque token, not the row id: it is the only key /email-status accepts
+    return {"status": "success", "message": "Ticket info is on its way to your inbox!", "message_id": message_id}
+
+@app.get("/email-status/{message_id}")
+async def email_status(message_id: str):
+    """
+    Delivery status of a queued email: queued, sending, sent or failed (with
+    the last error). message_id is the token /send-event-email returned.
+    """
+    status = await outbox.astatus(message_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown message id")
+    return status
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,152 @@
+import json
+import os
+import numpy as np
+
+# Optional in-memory engine for the events collection (VECTOR_ENGINE=numpy).
+# A build directory holds:
+#   vectors.npy        float32 [n, dim], rows L2-normalized
+#   vectors_meta.json  event ids plus the fields build_event_filter can constrain
+# The matrix is opened memory-mapped, so every uvicorn worker on the host
+# shares the same pages instead of keeping its own copy.
+VECTORS_FILE = "vectors.npy"
+VECTORS_META_FILE = "vectors_meta.json"
+
+COMPARISONS = {
+    "$eq": np.equal,
+    "$ne": np.not_equal,
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+class NumpyIndex:
+    """
+    Exact nearest-neighbour search: one matrix product per batch of queries,
+    then argpartition for the top k. Chroma-style `where` clauses become boolean masks.
+    """
+
+    def __init__(self, vectors, event_ids, columns):
+        self.vectors = vectors
+        self.event_ids = np.asarray(event_ids)
+        self.columns = columns      # field -> np.array aligned with the rows
+        self.rows = None            # event_id -> row, built on first vectors_for()
+
+    @classmethod
+    def build(cls, event_ids, vectors, metadatas):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors):
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1, norms)
+        columns = {
+            "date_ts": np.array([m.get("date_ts", -1) for m in metadatas], dtype=np.int64),
+            "price": np.array([m.get("price", 0.0) for m in metadatas], dtype=np.float64),
+            "category": np.array([m.get("category", "General") for m in metadatas], dtype=str),
+        }
+        return cls(vectors, event_ids, columns)
+
+    @classmethod
+    def from_chroma(cls, store):
+        """
+        Builds the index from a langchain Chroma store's stored embeddings (no re-embedding).
+        """
+        data = store.get(include=["embeddings", "metadatas"])
+        rows = [(m["event_id"], e, m) for e, m in zip(data["embeddings"], data["metadatas"]) if m and "event_id" in m]
+        return cls.build([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+
+    def save(self, db_path):
+        np.save(os.path.join(db_path, VECTORS_FILE), self.vectors)
+        with open(os.path.join(db_path, VECTORS_META_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "event_ids": self.event_ids.tolist(),
+                "columns": {name: values.tolist() for name, values in self.columns.items()},
+            }, f)
+
+    @classmethod
+    def load(cls, db_path):
+        """
+        The index saved in db_path (memory-mapped), or None if the build doesn't have one.
+        """
+        try:
+            with open(os.path.join(db_path, VECTORS_META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = np.load(os.path.join(db_path, VECTORS_FILE), mmap_mode="r")
+        except OSError:
+            return None
+        columns = {
+            "date_ts": np.array(meta["columns"]["date_ts"], dtype=np.int64),
+            "price": np.array(meta["columns"]["price"], dtype=np.float64),
+            "category": np.array(meta["columns"]["category"], dtype=str),
+        }
+        return cls(vectors, meta["event_ids"], columns)
+
+    def __len__(self):
+        return len(self.event_ids)
+
+    def mask(self, where):
+        """
+        Boolean row mask for a Chroma-style where clause (None = every row).
+        """
+        if not where:
+            return np.ones(len(self), dtype=bool)
+        if "$and" in where:
+            return np.logical_and.reduce([self.mask(clause) for clause in where["$and"]])
+        if "$or" in where:
+            return np.logical_or.reduce([self.mask(clause) for clause in where["$or"]])
+        result = np.ones(len(self), dtype=bool)
+        for field, condition in where.items():
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            column = self.event_ids if field == "event_id" else self.columns[field]
+            for op, target in condition.items():
+                if op == "$in":
+                    result &= np.isin(column, target)
+                elif op == "$nin":
+                    result &= ~np.isin(column, target)
+                else:
+                    result &= COMPARISONS[op](column, target)
+        return result
+
+    def search_batch(self, query_vectors, k=5, where=None):
+        """
+        Event ids of the k best rows for each query vector, best first.
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if not len(self) or not len(queries):
+            return [[] for _ in range(len(queries))]
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ self.vectors.T
+        allowed = self.mask(where)
+        scores[:, ~allowed] = -np.inf
+        k = min(k, int(allowed.sum()))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        ranked = np.take_along_axis(top, order, axis=1)
+        return [self.event_ids[row].tolist() for row in ranked]
+
+    def search(self, query_vector, k=5, where=None):
+        return self.search_batch([query_vector], k, where)[0]
+
+    def vectors_for(self, event_ids):
+        """
+        {event_id: vector} for the ids present in the index.
+        """
+        if self.rows is None:
+            self.rows = {event_id: row for row, event_id in enumerate(self.event_ids.tolist())}
+        return {i: self.vectors[self.rows[i]] for i in event_ids if i in self.rows}
+
+
+if __name__ == "__main__":
+    # Rebuild the matrix for the live index from what Chroma already stores.
+    # Running API workers pick it up on restart (or with the next published build).
+    from langchain_chroma import Chroma
+    from index_paths import resolve_active_index
+
+    path = resolve_active_index("./chroma_db")
+    index = NumpyIndex.from_chroma(Chroma(collection_name="events", persist_directory=path))
+    index.save(path)
+    print(f"🧮 Saved {len(index)} vectors to {os.path.join(path, VECTORS_FILE)}")
@@ -0,0 +1,129 @@
+import asyncio
+from langchain_core.messages import SystemMessage
+from intent_classifier import record_decision
+from telemetry import log, span, trace_id_var
+
+# --- PROMPTS ---
+
+ASSESSMENT_PROMPT = """
+[ACTION: DATABASE ENTRY]
+Role: DATA ANALYST (Not a chatbot).
+Task: Update the user's "Taste Profile" based on the conversation so far.
+
+RULES:
+1. Write 1 concise sentence summarizing their general tastes/personality.
+2. DO NOT include Location/Time/Budget.
+3. DO NOT use conversational language. Be factual.
+
+Example: "Enjoys low-key acoustic music and outdoor markets."
+"""
+
+def build_vibe_check_prompt(user_messages):
+    quoted = "\n".join(f'- "{m}"' for m in user_messages)
+    return SystemMessage(content=f"""
+    [SYSTEM ANALYSIS]
+    Analyze the USER'S latest messages:
+    {quoted}
+
+    Do these messages provide ANY hint about their personality, tastes, or mood?
+    (e.g., "I like jazz", "Something chill", "Not a fan of crowds", "I want to dance")
+
+    Ignore purely logistic messages like "NYC" or "Tomorrow".
+
+    Answer ONLY "YES" or "NO".
+    """)
+
+
+class ProfileUpdater:
+    """
+    Background worker that keeps users' taste profiles up to date.
+
+    Chat turns only call submit(); the vibe check and the profile summary run
+    later on a worker task. Messages from the same email that arrive within
+    `debounce` seconds (or while an update is still queued) are coalesced
+    into a single LLM assessment. An email is assessed by one worker at a
+    time: messages that arrive meanwhile wait in `pending` and are queued
+    again once the running assessment finishes, so an older result never
+    lands after a newer one. With a `classifier`, the vibe check is
+    answered locally whenever it is confident.
+    """
+
+    def __init__(self, get_llm, on_update, debounce=2.0, workers=2, classifier=None):
+        self.get_llm = get_llm          # () -> chat model, resolved when an update runs
+        self.on_update = on_update      # async callable(email, new_vibe)
+        self.classifier = classifier    # intent_classifier.IntentClassifier or None
+        self.debounce = debounce
+        self.workers = workers
+        self.queue = asyncio.Queue()
+        self.pending = {}               # email -> {"messages": [...], "history": [...]}
+        self.running = set()            # emails being assessed right now
+        self.deferred = set()           # emails that came up while already running
+        self._tasks = []
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, email, user_message, history):
+        """
+        Records a user message for assessment. `history` is a snapshot of the
+        chat so far; only the most recent snapshot per email is kept.
+        """
+        entry = self.pending.get(email)
+        if entry is None:
+            # The trace id of the first coalesced turn follows the update into the worker's logs
+            self.pending[email] = {"messages": [user_message], "history": list(history), "trace_id": trace_id_var.get()}
+            asyncio.get_running_loop().call_later(self.debounce, self.queue.put_nowait, email)
+        else:
+            entry["messages"].append(user_message)
+            entry["history"] = list(history)
+
+    async def _worker(self):
+        while True:
+            email = await self.queue.get()
+            if email in self.running:
+                # Picked up again when the running assessment is done
+                self.deferred.add(email)
+                self.queue.task_done()
+                continue
+            entry = self.pending.pop(email, None)
+            self.running.add(email)
+            try:
+                if entry:
+                    trace_id_var.set(entry["trace_id"])
+                    await self._assess(email, entry["messages"], entry["history"])
+            except Exception as e:
+                log(f"Failed to update vibe: {e}")
+            finally:
+                self.running.discard(email)
+                if email in self.deferred:
+                    self.deferred.discard(email)
+                    if email in self.pending:
+                        self.queue.put_nowait(email)
+                self.queue.task_done()
+
+    async def _assess(self, email, user_messages, history):
+        has_taste = self.classifier.taste_signal(user_messages) if self.classifier else None
+        record_decision("taste", has_taste)
+        if has_taste is None:
+            check_messages = history + [build_vibe_check_prompt(user_messages)]
+            with span("llm.vibe_check"):
+                check_response = await self.get_llm().ainvoke(check_messages)
+            has_taste = "YES" in check_response.content.strip().upper()
+
+        if not has_taste:
+            return
+
+        with span("llm.profile_summary"):
+            summary_response = await self.get_llm().ainvoke(history + [SystemMessage(content=ASSESSMENT_PROMPT)])
+        new_vibe = summary_response.content.replace('"', '').strip()
+
+        # on_update persists the profile and bumps its version; clients poll that, not this process
+        await self.on_update(email, new_vibe)
+        log(f"Profile Updated: {new_vibe}")
@@ -1,28 +1,210 @@
+import asyncio
 import os
+import threading
+import time
 import datetime
 from dotenv import load_dotenv
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_core.messages import SystemMessage
+from retrieval_cache import CacheStats, CachedEmbeddings, ResultCache, read_index_version
+from event_metadata import build_event_filter
+from index_paths import resolve_active_index
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from numpy_index import NumpyIndex
+from diversity import mmr_select
+from embedding_providers import create_embeddings, check_index_provider, provider_spec, spec_name
+from telemetry import log, register_collector, span
 
 # --- SETUP ---
 load_dotenv(dotenv_path="./.env")
 DB_PATH = "./chroma_db"
+EVENTS_COLLECTION = "events"
+# vector: Chroma only | bm25: keyword index only | hybrid: both, merged with reciprocal rank fusion
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# How deep each list goes before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))
+# Seen-aware paging: the candidate pool starts at CARDS * POOL_FACTOR and doubles
+# while too few unseen events come back, up to MAX_RETRIEVAL_K per search
+POOL_FACTOR = int(os.getenv("POOL_FACTOR", 4))
+MAX_RETRIEVAL_K = int(os.getenv("MAX_RETRIEVAL_K", 64))
+# Upper bound on the seen ids pushed into the where clause
+MAX_EXCLUDED_IDS = int(os.getenv("MAX_EXCLUDED_IDS", 500))
+# chroma: query the persistent Chroma store | numpy: memory-mapped matrix saved with the build
+VECTOR_ENGINE = os.getenv("VECTOR_ENGINE", "chroma")
+# Query run end to end by warm_up(); its embedding lands in the disk cache after the first start
+WARM_UP_QUERY = "live music tonight"
 
-print("\n🔋 SOCIALSYNC: Connecting to Neural Core...")
+# --- SERVICES ---
+# Nothing below is built at import: the embedding client, the chat model, the
+# result cache and the index are created on first use or by warm_up(), so the
+# module imports without credentials or an index. set_services() injects other
+# implementations (fakes in a test, a local model in a benchmark).
+# Query embeddings are cached on disk; results are cached until ingest.py rebuilds the index
+# EMBEDDING_PROVIDER picks the model (see embedding_providers.py); it must match the one that built the index
+_services = {"embeddings": None, "embedding_spec": None, "llm": None, "result_cache": None}
+_services_lock = threading.RLock()
+_readiness = {"ready": False, "error": None, "warm_up_seconds": None}
+# ingest.py publishes new builds by swapping chroma_db/CURRENT; follow it without restarting
+_active_index = {"path": None, "db": None, "bm25": None, "matrix": None}
 
-# Initialize Embeddings & Vector DB
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-vector_db = Chroma(persist_directory=DB_PATH, embedding_function=embeddings)
+def set_services(query_embeddings=None, embedding_spec=None, llm=None):
+    """
+    Replaces the embedding model (spec defaults to the configured provider's) and/or the chat model.
+    """
+    with _services_lock:
+        if query_embeddings is not None:
+            spec = embedding_spec or provider_spec()
+            _services["embeddings"] = CachedEmbeddings(query_embeddings, model_name=spec_name(spec))
+            _services["embedding_spec"] = spec
+            # The open index is bound to the old embedding function
+            _active_index["path"] = None
+        if llm is not None:
+            _services["llm"] = llm
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
+def get_embeddings():
+    with _services_lock:
+        if _services["embeddings"] is None:
+            query_embeddings, spec = create_embeddings()
+            _services["embeddings"] = CachedEmbeddings(query_embeddings, model_name=spec_name(spec))
+            _services["embedding_spec"] = spec
+        return _services["embeddings"]
 
-print("✅ SOCIALSYNC: Agent Online.")
+def get_llm():
+    with _services_lock:
+        if _services["llm"] is None:
+            from langchain_openai import ChatOpenAI
+            _services["llm"] = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
+        return _services["llm"]
+
+def get_result_cache():
+    with _services_lock:
+        if _services["result_cache"] is None:
+            _services["result_cache"] = ResultCache(lambda: read_index_version(resolve_active_index(DB_PATH)))
+        return _services["result_cache"]
+
+def get_vector_db():
+    path = resolve_active_index(DB_PATH)
+    if path == _active_index["path"]:
+        return _active_index["db"]
+    with _services_lock:
+        if path != _active_index["path"]:
+            # Imported here: chromadb alone is most of this module's import time
+            from langchain_chroma import Chroma
+            embeddings = get_embeddings()
+            spec = _services["embedding_spec"]
+            check_index_provider(path, spec)
+            _active_index["db"] = Chroma(collection_name=EVENTS_COLLECTION, persist_directory=path, embedding_function=embeddings)
+            _active_index["bm25"] = BM25Index.load(path)
+            _active_index["matrix"] = NumpyIndex.load(path) if VECTOR_ENGINE == "numpy" else None
+            if VECTOR_ENGINE == "numpy" and _active_index["matrix"] is None:
+                print(f"⚠️ SOCIALSYNC: No {path}/vectors.npy yet, using Chroma (run numpy_index.py or ingest.py)")
+            _active_index["path"] = path
+            print(f"📚 SOCIALSYNC: Using index at {path} ({spec_name(spec)})")
+        return _active_index["db"]
+
+def get_bm25_index():
+    """
+    Keyword index of the live build (None for builds made before it existed).
+    """
+    get_vector_db()
+    return _active_index["bm25"]
+
+def vector_search(query, k, where):
+    """
+    Event ids of the k nearest event vectors, from the numpy matrix when it is loaded.
+    """
+    get_vector_db()
+    matrix = _active_index["matrix"]
+    if matrix is not None:
+        vector = get_embeddings().embed_query(query)
+        with span("retrieval.vector"):
+            return matrix.search(vector, k, where)
+    with span("retrieval.vector"):
+        results = _active_index["db"].similarity_search(query, k=k, filter=where)
+    return [doc.metadata["event_id"] for doc in results if "event_id" in doc.metadata]
+
+async def avector_search(query, k, where):
+    get_vector_db()
+    matrix = _active_index["matrix"]
+    if matrix is not None:
+        vector = await get_embeddings().aembed_query(query)
+        with span("retrieval.vector"):
+            # A full scan at 100k+ rows takes milliseconds; keep it off the event loop
+            return await asyncio.to_thread(matrix.search, vector, k, where)
+    with span("retrieval.vector"):
+        results = await _active_index["db"].asimilarity_search(query, k=k, filter=where)
+    return [doc.metadata["event_id"] for doc in results if "event_id" in doc.metadata]
+
+def event_vectors(event_ids):
+    """
+    {event_id: stored vector} for the given events, used to tell near-duplicate cards apart.
+    """
+    get_vector_db()
+    matrix = _active_index["matrix"]
+    if matrix is not None:
+        return matrix.vectors_for(event_ids)
+    # Chroma ids follow ingest.document_key
+    data = _active_index["db"].get(ids=[f"event-{i}" for i in event_ids], include=["embeddings", "metadatas"])
+    return {m["event_id"]: e for e, m in zip(data["embeddings"], data["metadatas"]) if m and "event_id" in m}
+
+def candidate_count(k, mode):
+    return max(k, HYBRID_CANDIDATES) if mode == "hybrid" else k
+
+def fuse_results(vector_ids, search_query, where, k, mode):
+    """
+    Combines the vector hits with the BM25 hits for the raw query according to `mode`.
+    Falls back to the vector hits when the build has no keyword index.
+    """
+    bm25 = get_bm25_index()
+    if mode == "vector" or bm25 is None:
+        return vector_ids[:k]
+    with span("retrieval.bm25"):
+        lexical_ids = bm25.search(search_query, k=candidate_count(k, mode), where=where)
+    if mode == "bm25":
+        return lexical_ids[:k]
+    return reciprocal_rank_fusion([vector_ids, lexical_ids])[:k]
+
+def warm_up():
+    """
+    Builds the services, opens the live index and runs one search end to end
+    (query embedding, vector and keyword lookup, paging in vectors.npy), so the
+    first user request pays none of it. Returns the readiness state; a failure
+    is recorded there (and printed) rather than raised.
+    """
+    print("\n🔋 SOCIALSYNC: Connecting to Neural Core...")
+    start = time.perf_counter()
+    try:
+        with span("startup.services"):
+            get_embeddings()
+            get_llm()
+            get_result_cache()
+        with span("startup.index"):
+            get_vector_db()
+        with span("startup.first_search"):
+            SocialSyncAgent().retrieve_events(WARM_UP_QUERY, k=1)
+    except Exception as e:
+        _readiness.update(ready=False, error=str(e))
+        print(f"❌ SOCIALSYNC: Warm-up failed: {e}")
+        return readiness()
+    _readiness.update(ready=True, error=None, warm_up_seconds=round(time.perf_counter() - start, 3))
+    print(f"✅ SOCIALSYNC: Agent Online ({_readiness['warm_up_seconds']}s).")
+    return readiness()
+
+def readiness():
+    return dict(_readiness, index=_active_index["path"])
+
+def mark_ready():
+    """
+    A user search just went through end to end (lazily, with WARM_UP=0, or
+    after a failed warm-up recovered), which is all warm_up() would check.
+    """
+    if not _readiness["ready"]:
+        _readiness.update(ready=True, error=None)
 
 class SocialSyncAgent:
-    def __init__(self):
-        self.llm = llm 
+    def __init__(self, llm=None):
+        # None means the shared chat model, resolved on first use: retrieval-only
+        # callers (eval_retrieval.py, the warm-up search) never need credentials
+        self._llm = llm
         today = datetime.datetime.now().strftime("%Y-%m-%d")
         
         # --- BASE SYSTEM PROMPT ---
@@ -68,16 +250,102 @@ class SocialSyncAgent:
         
         self.chat_history = [SystemMessage(content=self.system_prompt)]
 
-    def retrieve_events(self, search_query, k=5):
+    @property
+    def llm(self):
+        return self._llm or get_llm()
+
+    def retrieve_events(self, search_query, k=5, upcoming_only=True, max_price=None, category=None, mode=RETRIEVAL_MODE, exclude_ids=None):
         """
-        Retrieves the top K matching events from the vector database.
+        Retrieves the ids of the top K matching events (vector, keyword or fused, see RETRIEVAL_MODE).
         """
-        print(f"   [DEBUG: Searching Vector DB for: '{search_query}']")
-        
-        results = vector_db.similarity_search(f"Event in Bucharest: {search_query}", k=k)
+        log(f"   [DEBUG: Searching Vector DB for: '{search_query}']")
         
+        where = build_event_filter(upcoming_only=upcoming_only, max_price=max_price, category=category, exclude_ids=exclude_ids)
+        # Event ids; main.py hydrates the cards from events.db
         events = []
-        for doc in results:
-            events.append(doc.page_content)
+        if mode != "bm25":
+            events = vector_search(f"Event in Bucharest: {search_query}", candidate_count(k, mode), where)
             
-        return events
\ No newline at end of file
+        return fuse_results(events, search_query, where, k, mode)
+
+    async def aretrieve_events(self, search_query, k=5, upcoming_only=True, max_price=None, category=None, mode=RETRIEVAL_MODE, exclude_ids=None):
+        """
+        Async variant of retrieve_events. The embedding request and the Chroma
+        lookup run off the event loop so other sessions keep being served.
+        Date, price and category constraints are applied inside the vector store
+        and the keyword index alike.
+        """
+        start = time.perf_counter()
+        result_cache = get_result_cache()
+        query = f"Event in Bucharest: {search_query}"
+        where = build_event_filter(upcoming_only=upcoming_only, max_price=max_price, category=category, exclude_ids=exclude_ids)
+        cached = result_cache.get(f"{mode}|{query}", k, where)
+        if cached is not None:
+            result_cache.stats.record(True, time.perf_counter() - start)
+            return cached
+
+        log(f"   [DEBUG: Searching Vector DB for: '{search_query}' (filter: {where})]")
+
+        events = []
+        if mode != "bm25":
+            events = await avector_search(query, candidate_count(k, mode), where)
+        events = fuse_results(events, search_query, where, k, mode)
+        result_cache.put(f"{mode}|{query}", k, events, where)
+        result_cache.stats.record(False, time.perf_counter() - start)
+        mark_ready()
+        return events
+
+    async def aretrieve_new_events(self, search_query, count=2, seen=(), **filters):
+        """
+        Up to `count` events the user hasn't seen, picked for variety.
+
+        Seen ids are excluded inside the search rather than after it, and the
+        candidate pool widens (doubling, capped at MAX_RETRIEVAL_K) only when
+        too few unseen events come back, so "show me more" keeps finding
+        events without an unbounded search. MMR over the pool keeps the cards
+        from being near-duplicates of each other.
+        """
+        # seen is in the order the cards were shown; the newest ids are the likeliest to match again
+        exclude = [i for i in reversed(list(seen)) if isinstance(i, int)][:MAX_EXCLUDED_IDS]
+        pool = min(count * POOL_FACTOR, MAX_RETRIEVAL_K)
+        while True:
+            found = await self.aretrieve_events(search_query, k=pool, exclude_ids=exclude, **filters)
+            fresh = [i for i in found if i not in seen]
+            # Enough to choose from, the index has nothing more, or the cap is reached
+            if len(fresh) >= count * POOL_FACTOR or len(found) < pool or pool >= MAX_RETRIEVAL_K:
+                break
+            pool = min(pool * 2, MAX_RETRIEVAL_K)
+        if len(fresh) <= count:
+            return fresh
+        with span("retrieval.mmr"):
+            vectors = await asyncio.to_thread(event_vectors, fresh)
+            return mmr_select(fresh, vectors, count)
+
+
+def embedding_cache_stats():
+    # Metrics must not build the embedding client (and need credentials) just to report zeros
+    embeddings = _services["embeddings"]
+    return embeddings.stats if embeddings is not None else CacheStats()
+
+def cache_stats():
+    """
+    Hit ratio, saved embedding calls and latency for the retrieval caches.
+    """
+    embedding_stats = embedding_cache_stats().as_dict()
+    embedding_stats["saved_embedding_calls"] = embedding_stats["hits"]
+    result_cache = get_result_cache()
+    result_stats = result_cache.stats.as_dict()
+    result_stats["invalidations"] = result_cache.invalidations
+    result_stats["entries"] = len(result_cache.entries)
+    return {"embedding_cache": embedding_stats, "result_cache": result_stats}
+
+@register_collector
+def cache_metrics():
+    """
+    The retrieval cache counters above, as Prometheus counters for /metrics.
+    """
+    families = []
+    for cache, stats in (("embedding", embedding_cache_stats()), ("result", get_result_cache().stats)):
+        families.append((f"socialsync_{cache}_cache_hits_total", "counter", f"{cache.capitalize()} cache hits.", [({}, stats.hits)]))
+        families.append((f"socialsync_{cache}_cache_misses_total", "counter", f"{cache.capitalize()} cache misses.", [({}, stats.misses)]))
+    return families
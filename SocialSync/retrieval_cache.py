@@ -0,0 +1,177 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from telemetry import span
+
+# --- CONFIGURATION ---
+EMBEDDING_CACHE_DB = os.getenv("EMBEDDING_CACHE_DB", "embedding_cache.db")
+EMBEDDING_CACHE_MAX = int(os.getenv("EMBEDDING_CACHE_MAX", 50000))
+RESULT_CACHE_MAX = int(os.getenv("RESULT_CACHE_MAX", 2000))
+INDEX_VERSION_FILE = "index_version"
+
+
+def normalize_query(text):
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+
+    def record(self, hit, seconds):
+        if hit:
+            self.hits += 1
+            self.hit_seconds += seconds
+        else:
+            self.misses += 1
+            self.miss_seconds += seconds
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "avg_hit_ms": round(1000 * self.hit_seconds / self.hits, 3) if self.hits else 0.0,
+            "avg_miss_ms": round(1000 * self.miss_seconds / self.misses, 3) if self.misses else 0.0,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings model with a persistent query-embedding cache.
+
+    Keys are the normalized query text plus the model name, vectors are kept
+    as float32 blobs in SQLite, and the least recently used rows are evicted
+    once there are more than `max_entries`. Document embeddings (ingest)
+    are passed straight through.
+    """
+
+    def __init__(self, inner, model_name, path=EMBEDDING_CACHE_DB, max_entries=EMBEDDING_CACHE_MAX):
+        self.inner = inner
+        self.model_name = model_name
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self.local = threading.local()
+        self.writes = 0
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    cache_key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_query_embeddings_used ON query_embeddings(last_used)")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _key(self, text):
+        return f"{self.model_name}|{normalize_query(text)}"
+
+    def embed_documents(self, texts):
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        start = time.perf_counter()
+        key = self._key(text)
+        conn = self._conn()
+        row = conn.execute("SELECT vector FROM query_embeddings WHERE cache_key = ?", (key,)).fetchone()
+        if row is not None:
+            with conn:
+                conn.execute("UPDATE query_embeddings SET last_used = ? WHERE cache_key = ?", (time.time(), key))
+            self.stats.record(True, time.perf_counter() - start)
+            return array("f", row[0]).tolist()
+
+        with span("embedding"):
+            vector = self.inner.embed_query(text)
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (cache_key, vector, last_used) VALUES (?, ?, ?)",
+                (key, array("f", vector).tobytes(), time.time())
+            )
+        self.writes += 1
+        if self.writes % 100 == 0:
+            self._evict()
+        self.stats.record(False, time.perf_counter() - start)
+        return vector
+
+    def _evict(self):
+        with self._conn() as conn:
+            conn.execute("""
+                DELETE FROM query_embeddings WHERE cache_key IN (
+                    SELECT cache_key FROM query_embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+
+def read_index_version(db_path):
+    """
+    Version stamp written by ingest.py after each rebuild ('' if never stamped).
+    """
+    try:
+        with open(os.path.join(db_path, INDEX_VERSION_FILE), "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def write_index_version(db_path):
+    with open(os.path.join(db_path, INDEX_VERSION_FILE), "w") as f:
+        f.write(str(time.time_ns()))
+
+
+class ResultCache:
+    """
+    In-process LRU of retrieval results keyed by (normalized query, k, filter).
+    Dropped wholesale whenever version_fn() (the live index's stamp) changes.
+    """
+
+    def __init__(self, version_fn, max_entries=RESULT_CACHE_MAX):
+        self.version_fn = version_fn
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.version = version_fn()
+        self.stats = CacheStats()
+        self.invalidations = 0
+
+    def _check_version(self):
+        version = self.version_fn()
+        if version != self.version:
+            self.entries.clear()
+            self.version = version
+            self.invalidations += 1
+
+    def _key(self, query, k, where):
+        return (normalize_query(query), k, json.dumps(where, sort_keys=True))
+
+    def get(self, query, k, where=None):
+        self._check_version()
+        key = self._key(query, k, where)
+        results = self.entries.get(key)
+        if results is not None:
+            self.entries.move_to_end(key)
+        return results
+
+    def put(self, query, k, results, where=None):
+        key = self._key(query, k, where)
+        self.entries[key] = results
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
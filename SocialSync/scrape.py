@@ -1,23 +1,27 @@
-import sqlite3
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import os
 import json
 import re
-from urllib.parse import urljoin
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse
 from openai import OpenAI
+from functools import lru_cache
 from dotenv import load_dotenv
+from http_cache import PageCache, text_hash
+from extractors import run_extractors
+import event_store
+from dedup import deduplicate_events
+from telemetry import LLM_TOKENS, print_summary, span
 
 # --- CONFIGURATION ---
 load_dotenv(dotenv_path="./.env")
 
-if not os.getenv("OPENAI_API_KEY"):
-    raise ValueError("ERROR: OPENAI_API_KEY not found in .env file")
-
-API_KEY = os.getenv("OPENAI_API_KEY")
-DATA_FOLDER = "data_raw"
-DB_NAME = "events.db"
-OUTPUT_TXT_FILE = os.path.join(DATA_FOLDER, "scraped_events.txt")
+DB_NAME = event_store.EVENTS_DB
 
 # LINKS TO SCRAPE
 urls_to_process = [
@@ -27,25 +31,50 @@ urls_to_process = [
     "https://berariah.ro/",
 ]
 
-client = OpenAI(api_key=API_KEY)
+# PIPELINE LIMITS
+SITE_WORKERS = 32          # sites in flight (fetch + parse)
+PER_HOST_LIMIT = 2         # concurrent requests to the same host
+EXTRACT_WORKERS = 8        # concurrent OpenAI extraction calls
+FETCH_RETRIES = 3
+CHUNK_CHARS = 12000        # per extraction call (the model input cap is 14000)
+MAX_CHUNKS_PER_PAGE = 20   # hard cost bound for very long listings
+BACKOFF_SECONDS = 1.0
+
+# Set SCRAPE_IGNORE_CACHE=1 to force a full download + extraction of every page
+USE_PAGE_CACHE = os.getenv("SCRAPE_IGNORE_CACHE") != "1"
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/91.0.4472.124 Safari/537.36'}
+
+# One pooled session for all fetch threads (keep-alive per host)
+http = requests.Session()
+http.headers.update(HEADERS)
+pooled_adapter = HTTPAdapter(pool_connections=64, pool_maxsize=PER_HOST_LIMIT)
+http.mount("https://", pooled_adapter)
+http.mount("http://", pooled_adapter)
+
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """
+    Built on the first extraction call, so the module imports without credentials.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("ERROR: OPENAI_API_KEY not found in .env file")
+    return OpenAI(api_key=api_key)
+
+host_limits = {}
+host_limits_lock = threading.Lock()
+
+def host_slot(url):
+    host = urlparse(url).netloc
+    with host_limits_lock:
+        if host not in host_limits:
+            host_limits[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return host_limits[host]
 
 def setup_db():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DROP TABLE IF EXISTS events")
-    cursor.execute("""
-        CREATE TABLE events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_name TEXT,
-            price REAL,
-            date_time TEXT,
-            available_seats INTEGER,
-            category TEXT,
-            source_url TEXT
-        )
-    """)
-    conn.commit()
-    return conn
+    # Schema lives in event_store: natural-key upserts, first_seen/last_seen, indexes
+    return event_store.connect(DB_NAME)
 
 def extract_structured_data(raw_text):
     """
@@ -83,54 +112,24 @@ def extract_structured_data(raw_text):
     user_message = f"Analyze this text and extract events:\n{raw_text[:14000]}"
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            response_format={"type": "json_object"}, 
-            temperature=0.1
-        )
+        with span("scrape.llm_extract"):
+            response = get_openai_client().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                response_format={"type": "json_object"}, 
+                temperature=0.1
+            )
+        if response.usage:
+            LLM_TOKENS.inc(response.usage.prompt_tokens, call="scrape_extract", kind="prompt")
+            LLM_TOKENS.inc(response.usage.completion_tokens, call="scrape_extract", kind="completion")
         return json.loads(response.choices[0].message.content)
     except Exception as e:
         print(f"   [OpenAI Error] {e}")
         return {"events": []}
 
-def append_to_txt_file(event_data, main_source_url):
-    name = event_data.get("name", "Unknown")
-    cat = event_data.get("category", "General")
-    desc = event_data.get("description", "No description available.")
-    date = event_data.get("date", "Upcoming")
-    loc = event_data.get("location", "Bucharest")
-    
-    # Handle Price Display
-    price_val = event_data.get("price", 0)
-    if price_val == 0:
-        price_str = "Free / Check Link"
-    else:
-        price_str = f"{price_val} RON"
-
-    # Use specific URL if found, else fallback to main list
-    specific_url = event_data.get("event_url")
-    if not specific_url or "http" not in specific_url:
-        specific_url = main_source_url
-
-    entry = f"""Event: {name}
-Category: {cat}
-Description: {desc}
-Target Audience: General.
-Date: {date}
-Location: {loc}
-Cost: {price_str}
-Source: {specific_url}
-
-------------------------------------------------
-
-"""
-    with open(OUTPUT_TXT_FILE, "a", encoding="utf-8") as f:
-        f.write(entry)
-
 def preprocess_html(html_content, base_url):
     """
     Injects URLs directly into the visible text so GPT can see them.
@@ -161,66 +160,192 @@ def preprocess_html(html_content, base_url):
     lines = [line.strip() for line in text.splitlines() if line.strip()]
     return "\n".join(lines)
 
-def run_ingestion_process():
-    if not os.path.exists(DATA_FOLDER):
-        os.makedirs(DATA_FOLDER)
-    
-    if os.path.exists(OUTPUT_TXT_FILE):
-        os.remove(OUTPUT_TXT_FILE)
+def fetch_page(url, headers=None):
+    """
+    GET with per-host concurrency limits and exponential backoff on
+    connection errors, 429 and 5xx. Returns the response (200, or 304 for a
+    conditional request), or None on failure.
+    """
+    for attempt in range(FETCH_RETRIES + 1):
+        try:
+            with host_slot(url), span("scrape.fetch"):
+                response = http.get(url, headers=headers, timeout=15)
+            if response.status_code in (200, 304):
+                return response
+            if response.status_code != 429 and response.status_code < 500:
+                return None
+        except requests.RequestException as e:
+            print(f"      [Fetch Error] {url}: {e}")
+        if attempt < FETCH_RETRIES:
+            time.sleep(BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random()))
+    return None
+
+def chunk_page_text(text, max_chars=CHUNK_CHARS):
+    """
+    Splits preprocessed page text into chunks of at most max_chars without
+    cutting through an event. A line carrying an injected '[URL: ...]' marks
+    the start of a new event block; blocks are packed greedily into chunks.
+    """
+    blocks = []
+    current = []
+    for line in text.split("\n"):
+        if "[URL: " in line and current:
+            blocks.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+
+    chunks = []
+    chunk = ""
+    for block in blocks:
+        # A single oversized block is cut on line boundaries as a last resort
+        while len(block) > max_chars:
+            cut = block.rfind("\n", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if chunk:
+                chunks.append(chunk)
+                chunk = ""
+            chunks.append(block[:cut])
+            block = block[cut:].lstrip("\n")
+        if chunk and len(chunk) + 1 + len(block) > max_chars:
+            chunks.append(chunk)
+            chunk = ""
+        chunk = f"{chunk}\n{block}" if chunk else block
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def merge_events(batches):
+    """
+    Concatenates per-chunk results, dropping repeats (same name and date, or same event URL).
+    """
+    merged = []
+    seen = set()
+    for events in batches:
+        for ev in events:
+            name_key = (re.sub(r"\W+", " ", str(ev.get("name", ""))).strip().lower(), ev.get("date"))
+            url_key = ev.get("event_url")
+            if name_key in seen or (url_key and url_key in seen):
+                continue
+            seen.add(name_key)
+            if url_key:
+                seen.add(url_key)
+            merged.append(ev)
+    return merged
+
+def scrape_site(url, extract_pool, page_cache=None):
+    """
+    Fetch and parse stages for one site; the page's chunks are extracted in
+    parallel on the shared extract pool. Returns the merged events and how
+    much of the page text was sent to the model.
+
+    With a page cache, unchanged pages (HTTP 304, or identical cleaned text)
+    reuse the events from the previous run and skip extraction.
+    """
+    print(f"   🔗 Scraping: {url}...")
+    cached = page_cache.get(url) if page_cache else None
+    conditional = page_cache.conditional_headers(cached) if page_cache else {}
+
+    response = fetch_page(url, headers=conditional)
+    if response is None:
+        print(f"      [!] Failed to connect: {url}")
+        return {"events": [], "coverage": None, "llm_calls": 0}
+
+    if response.status_code == 304:
+        print(f"      [Cache] Not modified, reusing {len(cached['events'])} events: {url}")
+        return {"events": cached["events"], "coverage": None, "llm_calls": 0}
+
+    # Known layouts (JSON-LD, CSS selectors) are parsed directly, no model call needed
+    with span("scrape.rule_extract"):
+        extractor_name, events = run_extractors(response.content, url)
+    if events:
+        print(f"      [Extractor] {extractor_name} found {len(events)} events: {url}")
+        # Stored for the validators only: the next run's conditional GET can skip the
+        # download too. No text hash, since the extractor reruns on any changed page.
+        if page_cache:
+            page_cache.put(url, response, None, events)
+        return {"events": events, "coverage": None, "llm_calls": 0, "extractor": extractor_name}
+
+    with span("scrape.preprocess"):
+        clean_text_with_links = preprocess_html(response.content, url)
+    page_hash = text_hash(clean_text_with_links)
+    if cached and cached["events"] and cached["text_hash"] == page_hash:
+        print(f"      [Cache] Text unchanged, reusing {len(cached['events'])} events: {url}")
+        page_cache.put(url, response, page_hash, cached["events"])
+        return {"events": cached["events"], "coverage": None, "llm_calls": 0}
+
+    chunks = chunk_page_text(clean_text_with_links)
+    processed = chunks[:MAX_CHUNKS_PER_PAGE]
 
+    print(f"      [AI] Extracting structured data from {url} ({len(processed)} chunks)...")
+    futures = [extract_pool.submit(extract_structured_data, chunk) for chunk in processed]
+    events = merge_events(f.result().get("events", []) for f in futures)
+
+    coverage = {
+        "chars_total": len(clean_text_with_links),
+        "chars_processed": sum(len(c) for c in processed),
+        "chunks": len(processed),
+        "chunks_skipped": len(chunks) - len(processed),
+    }
+    # Empty results are not cached, so a failed extraction is retried next run
+    if page_cache and events:
+        page_cache.put(url, response, page_hash, events)
+    return {"events": events, "coverage": coverage, "llm_calls": len(processed)}
+
+def save_events(conn, url, found_events, seen_at):
+    # One batched upsert transaction per site; ingest.py reads the rows straight from events.db
+    return event_store.upsert_events(conn, found_events, url, seen_at)
+
+def run_ingestion_process():
+    # The OpenAI client is built at the first LLM fallback (extract_structured_data), so a run
+    # served entirely by the extractors and the page cache needs no API key
     conn = setup_db()
-    cursor = conn.cursor()
+    run_started_at = time.time()
     
     print(f"\n--- 🌍 STARTING SMART SCRAPER ({len(urls_to_process)} sites) ---")
-    
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/91.0.4472.124 Safari/537.36'}
+    started = time.perf_counter()
+    llm_calls = 0
+    extractor_sites = 0
 
-    for url in urls_to_process:
-        print(f"   🔗 Scraping: {url}...")
-        try:
-            response = requests.get(url, headers=headers, timeout=15)
-            if response.status_code != 200:
-                print("      [!] Failed to connect.")
+    # Sites move through fetch/parse and extraction concurrently; this thread is the only writer.
+    with ThreadPoolExecutor(max_workers=EXTRACT_WORKERS) as extract_pool, \
+         ThreadPoolExecutor(max_workers=SITE_WORKERS) as site_pool:
+        page_cache = PageCache() if USE_PAGE_CACHE else None
+        futures = {site_pool.submit(scrape_site, url, extract_pool, page_cache): url for url in urls_to_process}
+
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"      [Error] {url}: {e}")
                 continue
-            
-            clean_text_with_links = preprocess_html(response.content, url)
-            
-            print("      [AI] Extracting structured data...")
-            json_data = extract_structured_data(clean_text_with_links)
-            found_events = json_data.get("events", [])
-            
+
+            found_events = result["events"]
+            llm_calls += result["llm_calls"]
+            extractor_sites += 1 if result.get("extractor") else 0
+            coverage = result["coverage"]
+            if coverage:
+                share = coverage["chars_processed"] / max(coverage["chars_total"], 1)
+                print(f"      [Coverage] {url}: {coverage['chars_processed']}/{coverage['chars_total']} chars "
+                      f"({share:.0%}) in {coverage['chunks']} chunks, {coverage['chunks_skipped']} skipped")
+
             if not found_events:
-                print("      [!] No events found.")
+                print(f"      [!] No events found: {url}")
                 continue
 
-            count = 0
-            for ev in found_events:
-                if ev.get("name"):
-                    # SQL (Student 1)
-                    cursor.execute("""
-                        INSERT INTO events (event_name, price, date_time, available_seats, category, source_url)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (
-                        ev.get("name"), 
-                        ev.get("price", 0), 
-                        ev.get("date"), 
-                        50, 
-                        ev.get("category"), 
-                        ev.get("event_url", url)
-                    ))
-                    
-                    # TXT (Student 2 - RAG)
-                    append_to_txt_file(ev, url)
-                    count += 1
-            
-            print(f"      [OK] Successfully saved {count} events.")
-
-        except Exception as e:
-            print(f"      [Error] {e}")
-
-    conn.commit()
+            with span("scrape.save"):
+                count = save_events(conn, url, found_events, run_started_at)
+            print(f"      [OK] Successfully saved {count} events from {url}.")
+
+    # Merge the same event listed on several sites before it reaches the index
+    with span("scrape.dedup"):
+        deduplicate_events(conn)
     conn.close()
-    print(f"\n✅ SCRAPING COMPLETE.")
+    print(f"\n✅ SCRAPING COMPLETE in {time.perf_counter() - started:.1f}s.")
+    print(f"   LLM calls: {llm_calls} | Sites parsed without LLM: {extractor_sites}")
+    print_summary()
     print("👉 Now run 'python ingest.py'!")
 
 if __name__ == "__main__":
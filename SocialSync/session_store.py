@@ -0,0 +1,238 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from rag_logic import SocialSyncAgent
+
+# --- CONFIGURATION ---
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")    # memory | sqlite | redis
+SESSION_DB = os.getenv("SESSION_DB", "sessions.db")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 6 * 3600))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", 5000))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", 64 * 1024 * 1024))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+# --- SERIALIZATION ---
+
+def new_session():
+    # seen_events is a dict used as an insertion-ordered set (values unused), so the
+    # most recently shown ids can be told apart from the oldest ones. last_query is
+    # the latest search, re-run when the user only changes time, place or budget
+    return {"agent": SocialSyncAgent(), "seen_events": {}, "last_query": None}
+
+def dump_session(session_data):
+    return json.dumps({
+        "history": messages_to_dict(session_data["agent"].chat_history),
+        "seen_events": list(session_data["seen_events"]),
+        "last_query": session_data["last_query"]
+    })
+
+def load_session(payload):
+    data = json.loads(payload)
+    agent = SocialSyncAgent()
+    agent.chat_history = messages_from_dict(data["history"])
+    return {"agent": agent, "seen_events": dict.fromkeys(data["seen_events"]), "last_query": data.get("last_query")}
+
+def estimate_size(session_data):
+    """
+    Rough in-memory footprint in bytes; good enough to enforce a budget without serializing.
+    """
+    history = session_data["agent"].chat_history
+    return sum(len(m.content) for m in history) + sum(len(str(e)) for e in session_data["seen_events"])
+
+
+# --- BACKENDS ---
+
+class SessionStore:
+    """
+    Maps session_id -> {"agent": SocialSyncAgent, "seen_events": {event_id: None}, "last_query": str | None}.
+
+    get() returns None for unknown or expired sessions. Callers must put()
+    the session back after mutating it; serialized backends hand out copies.
+    The async wrappers run the blocking backends on a worker thread.
+    """
+
+    def get(self, session_id):
+        raise NotImplementedError
+
+    def put(self, session_id, session_data):
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    async def aget(self, session_id):
+        return await asyncio.to_thread(self.get, session_id)
+
+    async def aput(self, session_id, session_data):
+        await asyncio.to_thread(self.put, session_id, session_data)
+
+    async def adelete(self, session_id):
+        await asyncio.to_thread(self.delete, session_id)
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Single-process store with LRU eviction, an idle TTL and a memory budget.
+    """
+
+    def __init__(self, max_sessions=SESSION_MAX_COUNT, idle_ttl=SESSION_TTL_SECONDS, max_bytes=SESSION_MAX_BYTES):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    # session_id -> (session_data, last_access, size)
+        self.total_bytes = 0
+
+    def get(self, session_id):
+        entry = self.entries.get(session_id)
+        if entry is None:
+            return None
+        session_data, last_access, size = entry
+        if time.time() - last_access > self.idle_ttl:
+            self.delete(session_id)
+            return None
+        self.entries[session_id] = (session_data, time.time(), size)
+        self.entries.move_to_end(session_id)
+        return session_data
+
+    def put(self, session_id, session_data):
+        self.delete(session_id)
+        size = estimate_size(session_data)
+        self.entries[session_id] = (session_data, time.time(), size)
+        self.total_bytes += size
+        self._evict()
+
+    def delete(self, session_id):
+        entry = self.entries.pop(session_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+
+    def _evict(self):
+        now = time.time()
+        # Oldest first: stop at the first entry that is neither expired nor over budget
+        while self.entries:
+            session_id, (_, last_access, _) = next(iter(self.entries.items()))
+            over_budget = len(self.entries) > self.max_sessions or self.total_bytes > self.max_bytes
+            if not over_budget and now - last_access <= self.idle_ttl:
+                break
+            self.delete(session_id)
+
+    # Nothing here blocks, so skip the thread hop
+    async def aget(self, session_id):
+        return self.get(session_id)
+
+    async def aput(self, session_id, session_data):
+        self.put(session_id, session_data)
+
+    async def adelete(self, session_id):
+        self.delete(session_id)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Serialized sessions in a local SQLite file, shared by every uvicorn worker on the host.
+    Expired rows are purged and the row count is capped (least recently used first) on write.
+    """
+
+    def __init__(self, path=SESSION_DB, max_sessions=SESSION_MAX_COUNT, idle_ttl=SESSION_TTL_SECONDS):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.local = threading.local()
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at)")
+        conn.commit()
+        self.writes = 0
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, session_id):
+        row = self._conn().execute(
+            "SELECT payload, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.idle_ttl:
+            return None
+        return load_session(row[0])
+
+    def put(self, session_id, session_data):
+        conn = self._conn()
+        with conn:
+            conn.execute("""
+                INSERT INTO sessions (session_id, payload, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at
+            """, (session_id, dump_session(session_data), time.time()))
+        self.writes += 1
+        if self.writes % 100 == 0:
+            self._evict()
+
+    def delete(self, session_id):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _evict(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.idle_ttl,))
+            conn.execute("""
+                DELETE FROM sessions WHERE session_id IN (
+                    SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_sessions,))
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Serialized sessions in Redis (or anything speaking its get/set/delete API).
+    Idle TTL maps to key expiry; LRU and the memory budget are left to the
+    server's maxmemory / allkeys-lru policy.
+    """
+
+    def __init__(self, client, idle_ttl=SESSION_TTL_SECONDS, prefix="socialsync:session:"):
+        self.client = client
+        self.idle_ttl = idle_ttl
+        self.prefix = prefix
+
+    def get(self, session_id):
+        payload = self.client.get(self.prefix + session_id)
+        if payload is None:
+            return None
+        # Sliding expiry: reading a session keeps it alive
+        self.client.expire(self.prefix + session_id, self.idle_ttl)
+        return load_session(payload)
+
+    def put(self, session_id, session_data):
+        self.client.set(self.prefix + session_id, dump_session(session_data), ex=self.idle_ttl)
+
+    def delete(self, session_id):
+        self.client.delete(self.prefix + session_id)
+
+
+def create_session_store(backend=SESSION_BACKEND):
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "redis":
+        import redis  # optional dependency, only needed for this backend
+        return RedisSessionStore(redis.Redis.from_url(REDIS_URL))
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
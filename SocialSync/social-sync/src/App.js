@@ -6,6 +6,10 @@ import AuthModal from './components/AuthModal';
 import { Send, Bot, User, LogIn, LogOut, Database, Mail } from 'lucide-react'; // Added Mail
 
 const SESSION_ID = "user-session-1";
+// The profile is refreshed in the background: poll with backoff until it changes or we give up
+const VIBE_POLL_FIRST_DELAY_MS = 1000;
+const VIBE_POLL_MAX_DELAY_MS = 8000;
+const VIBE_POLL_TIMEOUT_MS = 30000;
 
 function App() {
 
@@ -38,7 +42,7 @@ function App() {
 
       const data = await response.json();
       if (data.status === 'success') {
-        alert("Email sent successfully! 📬");
+        alert("Email is on its way! 📬");
       } else {
         alert("Failed to send email.");
       }
@@ -133,15 +137,48 @@ function App() {
 
   // --- AUTH HANDLERS ---
   const handleLoginSuccess = (userData) => {
+    vibeVersion.current = userData.profile_version || 0;
     setUser(userData);
     handleReset(userData);
   };
 
   const handleLogout = () => {
+    vibePoll.current += 1;
     setUser(null);
     handleReset(null);
   };
 
+  // --- VIBE POLLING ---
+  const vibeVersion = useRef(user?.profile_version || 0);
+  const vibePoll = useRef(0);
+
+  const pollVibeUpdate = async (token) => {
+    // A newer turn (or a logout) takes over from any poll still running
+    const poll = ++vibePoll.current;
+    const deadline = Date.now() + VIBE_POLL_TIMEOUT_MS;
+    let delay = VIBE_POLL_FIRST_DELAY_MS;
+
+    while (Date.now() + delay <= deadline) {
+      await new Promise(resolve => setTimeout(resolve, delay));
+      if (poll !== vibePoll.current) return;
+      try {
+        const response = await fetch(
+          `http://localhost:8000/profile-updates?token=${encodeURIComponent(token)}&since=${vibeVersion.current}`
+        );
+        if (response.status === 401) return;
+        const data = await response.json();
+        if (data.changed) {
+          vibeVersion.current = data.version;
+          setUser(prevUser => prevUser ? ({ ...prevUser, profile: data.profile, profile_version: data.version }) : prevUser);
+          return;
+        }
+      } catch (error) {
+        console.error("Vibe poll error:", error);
+      }
+      delay = Math.min(delay * 2, VIBE_POLL_MAX_DELAY_MS);
+    }
+  };
+
   // --- CHAT HANDLERS ---
   const handleSend = async () => {
     if (!input.trim()) return;
@@ -173,11 +210,9 @@ function App() {
       if (data.mission_complete) setIsComplete(true);
 
       // --- LIVE VIBE UPDATE ---
-      if (data.new_vibe && user) {
-        setUser(prevUser => ({
-            ...prevUser,
-            profile: data.new_vibe
-        }));
+      // Users saved before tokens existed have to log in again to get live updates
+      if (user?.token) {
+        pollVibeUpdate(user.token);
       }
 
     } catch (error) {
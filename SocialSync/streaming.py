@@ -0,0 +1,127 @@
+import json
+import re
+
+COMMAND_MARKER = "SEARCH_ACTION"
+# Markdown decoration the model sometimes wraps the command in ("**SEARCH_ACTION:**")
+LEADING_MARKUP = " \t*`#>-_"
+_MARKER_PATTERN = re.compile(re.escape(COMMAND_MARKER), re.IGNORECASE)
+
+
+def sse(event, payload):
+    """
+    Formats one Server-Sent Event frame.
+    """
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def command_cut(line):
+    """
+    Where a command line is cut: the marker, everything after it and the markdown
+    right in front of it go. None when the line has no marker.
+    """
+    match = _MARKER_PATTERN.search(line)
+    if match is None:
+        return None
+    return len(line[:match.start()].rstrip(LEADING_MARKUP))
+
+def strip_commands(text):
+    """
+    Drops SEARCH_ACTION and the rest of its line; a command line with nothing
+    in front of the marker goes entirely.
+    """
+    lines = []
+    for line in text.split("\n"):
+        cut = command_cut(line)
+        if cut is None:
+            lines.append(line)
+        elif cut:
+            lines.append(line[:cut])
+    return "\n".join(lines).strip()
+
+def _marker_prefix_len(upper_line):
+    """
+    Length of the longest suffix of the line that could still grow into the marker.
+    """
+    for size in range(min(len(COMMAND_MARKER) - 1, len(upper_line)), 0, -1):
+        if COMMAND_MARKER.startswith(upper_line[-size:]):
+            return size
+    return 0
+
+
+class CommandStripper:
+    """
+    Incremental version of strip_commands, with the same output for any chunking.
+
+    Text is fed chunk by chunk as the model streams it. The marker and the rest
+    of its line never reach the client; text in front of it on the same line
+    does, as in strip_commands. Text that might still turn into the marker is
+    held back until the line disambiguates itself, and markdown right in front
+    of a possible marker is held along with it. Leading and trailing whitespace
+    is dropped, like the .strip() on the full text.
+    """
+
+    def __init__(self):
+        self.line = ""
+        self.consumed = 0       # chars of the current line already released
+        self.dropped = False    # current line is a command line
+        self.started = False
+        self.held = ""          # trailing whitespace, sent only if more text follows
+
+    def feed(self, chunk):
+        self.line += chunk
+        out = []
+        while "\n" in self.line:
+            line, self.line = self.line.split("\n", 1)
+            out.append(self._finish_line(line))
+        out.append(self._release_partial())
+        return "".join(out)
+
+    def flush(self):
+        line, self.line = self.line, ""
+        text = self._finish_line(line)
+        self.held = ""
+        return text
+
+    def _emit(self, text):
+        if not self.started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self.started = True
+        text = self.held + text
+        visible = text.rstrip()
+        self.held = text[len(visible):]
+        return visible
+
+    def _release_partial(self):
+        if self.dropped:
+            return ""
+        cut = command_cut(self.line)
+        if cut is not None:
+            self.dropped = True
+            return self._release_until(cut)
+        upper = self.line.upper()
+        safe_until = len(self.line) - _marker_prefix_len(upper)
+        while safe_until > self.consumed and self.line[safe_until - 1] in LEADING_MARKUP:
+            safe_until -= 1
+        return self._release_until(safe_until)
+
+    def _release_until(self, end, line=None):
+        line = self.line if line is None else line
+        if end <= self.consumed:
+            return ""
+        text = line[self.consumed:end]
+        self.consumed = end
+        return self._emit(text)
+
+    def _finish_line(self, line):
+        # A dropped line already released what came before its marker
+        cut = None if self.dropped else command_cut(line)
+        is_command = self.dropped or cut is not None
+        text = "" if self.dropped else self._release_until(len(line) if cut is None else cut, line)
+        # Command lines with nothing kept disappear, newline included
+        if self.started and (not is_command or self.consumed):
+            self.held += "\n"
+        self.consumed = 0
+        self.dropped = False
+        return text
@@ -0,0 +1,165 @@
+import bisect
+import contextvars
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Stage timings, counters and a per-request trace id with no external dependency.
+# Cost per span is two perf_counter() calls, a bisect and a short lock, so it
+# stays on in production. /metrics renders everything in the Prometheus text
+# format; batch scripts (scrape.py, ingest.py) print print_summary() at the end.
+# Metrics are per process: with several uvicorn workers each one reports its own.
+
+# Seconds; covers cache hits (sub-ms) through slow LLM calls and page fetches
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+trace_id_var = contextvars.ContextVar("trace_id", default=None)
+# Client-supplied ids end up in log lines and response headers, so only short plain ones are kept
+CLIENT_TRACE_ID = re.compile(r"[A-Za-z0-9-]{1,64}")
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+def accept_trace_id(header):
+    """
+    The caller's X-Request-ID if it is a short [A-Za-z0-9-] token, otherwise a fresh id.
+    """
+    if header and CLIENT_TRACE_ID.fullmatch(header):
+        return header
+    return new_trace_id()
+
+def log(message):
+    """
+    print() with the current request's trace id, so one turn's lines can be grepped together.
+    """
+    trace_id = trace_id_var.get()
+    print(f"[trace={trace_id}] {message}" if trace_id else message)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.series = {}    # label values -> [bucket counts..., count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = {key: list(series) for key, series in self.series.items()}
+        for key, series in sorted(snapshot.items()):
+            labels = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(labels + [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_text(labels + [('le', '+Inf')])} {series[-2]}")
+            lines.append(f"{self.name}_count{_label_text(labels)} {series[-2]}")
+            lines.append(f"{self.name}_sum{_label_text(labels)} {series[-1]:.6f}")
+        return lines
+
+    def summary(self):
+        """
+        {label values: (count, total seconds)}.
+        """
+        with self.lock:
+            return {key: (series[-2], series[-1]) for key, series in self.series.items()}
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            snapshot = dict(self.values)
+        for key, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_label_text(list(zip(self.label_names, key)))} {value}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("socialsync_stage_seconds", "Time spent per pipeline stage.", ["stage"])
+HTTP_SECONDS = Histogram("socialsync_http_request_seconds", "HTTP request latency.", ["method", "path", "status"])
+LLM_TOKENS = Counter("socialsync_llm_tokens_total", "LLM tokens by call label and kind (prompt/completion).", ["call", "kind"])
+INTENT_DECISIONS = Counter("socialsync_intent_decisions_total", "Routing decisions by intent, taken locally or by the LLM.", ["intent", "source"])
+
+METRICS = [STAGE_SECONDS, HTTP_SECONDS, LLM_TOKENS, INTENT_DECISIONS]
+# Callables returning [(name, type, help, [(labels dict, value), ...])], evaluated at scrape time
+COLLECTORS = []
+
+
+@contextmanager
+def span(stage):
+    """
+    Times a block into socialsync_stage_seconds{stage=...}; works around awaits too.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+def register_collector(fn):
+    COLLECTORS.append(fn)
+    return fn
+
+def render_prometheus():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for collector in COLLECTORS:
+        try:
+            families = collector()
+        except Exception as e:
+            log(f"⚠️ metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+            continue
+        for name, metric_type, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_label_text(sorted(labels.items()))} {value}")
+    return "\n".join(lines) + "\n"
+
+def print_summary(title="Stage timings"):
+    stages = STAGE_SECONDS.summary()
+    if not stages:
+        return
+    print(f"⏱️  {title}:")
+    for (stage,), (count, total) in sorted(stages.items(), key=lambda item: -item[1][1]):
+        print(f"   {stage:<28} {count:>6} x   total {total:8.2f}s   avg {1000 * total / count:9.1f} ms")
@@ -0,0 +1,105 @@
+import datetime
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from extractors import normalize_date, romanian_date, run_extractors
+from event_metadata import UNKNOWN_DATE, parse_date_ts
+
+# Saved listing pages in data_eval/pages, run through the extractors:
+#   python -m pytest test_extractors.py
+# Refresh a page by saving the live listing over its file; the counts and
+# first-event fields below then need updating to match.
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_eval", "pages")
+
+
+def load_page(name):
+    with open(os.path.join(PAGES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def test_iabilet_listing_uses_css_layout():
+    name, events = run_extractors(load_page("iabilet_bucuresti.html"), "https://www.iabilet.ro/bilete-in-bucuresti/")
+    assert name == "css:iabilet"
+    assert len(events) == 8
+    assert events[3] == {
+        "name": "Balkanique Party • Heavy Yard",
+        "price": 53.0,
+        "date": "2025-12-06 00:00",
+        "location": "Heavy Yard",
+        "category": "General",
+        "description": "",
+        "event_url": "https://www.iabilet.ro/bilete-balkanique-party-o-heavy-yard-119653/",
+    }
+    # Every listing date must reach events.db as a real timestamp, or upcoming-only search drops the event
+    assert all(parse_date_ts(ev["date"]) != UNKNOWN_DATE for ev in events)
+
+def test_jsonld_graph_listing():
+    name, events = run_extractors(load_page("zilesinopti_bucuresti.html"), "https://zilesinopti.ro/evenimente-bucuresti/")
+    assert name == "jsonld"
+    assert len(events) == 6
+    first = events[0]
+    assert first["name"] == "Cei trei purceluşi"
+    assert first["date"] == "2025-12-06 10:00"
+    assert first["location"] == "Teatrul Țăndărică"
+    assert first["category"] == "Theater"
+    assert first["event_url"] == "https://zilesinopti.ro/evenimente/cei-trei-purcelusi-teatrul-tandarica/"
+
+def test_unstructured_page_falls_back_to_llm():
+    assert run_extractors(load_page("berariah.html"), "https://berariah.ro/") == (None, [])
+
+def test_css_layout_is_limited_to_its_host():
+    name, _ = run_extractors(load_page("iabilet_bucuresti.html"), "https://example.com/events/")
+    assert name is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2025-12-06T20:00:00+02:00", "2025-12-06 20:00"),
+    ("06.12.2025 20:00", "2025-12-06 20:00"),
+    ("06.12.2025", "2025-12-06 00:00"),
+    ("vin 31 oct 2025", "2025-10-31 00:00"),
+    ("sâm 06 dec 2025, 20:00", "2025-12-06 20:00"),
+    ("6 decembrie 2025 ora 19:30", "2025-12-06 19:30"),
+    ("31 oct - 30 nov 2025", "2025-10-31 00:00"),
+    ("", "Upcoming"),
+    ("30 feb 2025", "30 feb 2025"),
+    ("in curand", "in curand"),
+])
+def test_normalize_date(value, expected):
+    assert normalize_date(value) == expected
+
+def test_romanian_date_without_year_rolls_over():
+    today = datetime.date(2025, 12, 20)
+    assert romanian_date("10 ian", today=today) == datetime.datetime(2026, 1, 10)
+    assert romanian_date("10 dec", today=today) == datetime.datetime(2025, 12, 10)
+
+
+class QuietPageHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def page_server():
+    handler = functools.partial(QuietPageHandler, directory=PAGES_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+def test_extractor_results_enable_conditional_get(page_server, tmp_path):
+    from http_cache import PageCache
+    from scrape import scrape_site
+    url = f"{page_server}/zilesinopti_bucuresti.html"
+    cache = PageCache(str(tmp_path / "cache.db"))
+
+    first = scrape_site(url, extract_pool=None, page_cache=cache)
+    assert first["extractor"] == "jsonld" and len(first["events"]) == 6
+    assert cache.conditional_headers(cache.get(url))
+
+    # Unchanged page: 304, cached events, no extractor or LLM run
+    second = scrape_site(url, extract_pool=None, page_cache=cache)
+    assert "extractor" not in second
+    assert second["events"] == first["events"]
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+# --- CONFIGURATION ---
+USER_DB = os.getenv("USER_DB", "users.db")
+LEGACY_JSON = "users.json"
+
+
+class UserStore:
+    """
+    SQLite (WAL) user repository keyed by email.
+
+    Every change is a single-row statement, so the cost of a registration or a
+    profile update does not depend on how many users exist, concurrent workers
+    can share the file, and a crash can only lose the statement in flight.
+    """
+
+    def __init__(self, path=USER_DB):
+        self.path = path
+        self.local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    email TEXT PRIMARY KEY,
+                    password TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    profile TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            # Profile updates are polled from any worker, so their version lives here too;
+            # the token is the client's credential for reading them
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(users)")]
+            if "profile_version" not in columns:
+                conn.execute("ALTER TABLE users ADD COLUMN profile_version INTEGER NOT NULL DEFAULT 0")
+            if "token" not in columns:
+                conn.execute("ALTER TABLE users ADD COLUMN token TEXT")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_token ON users(token)")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, email):
+        row = self._conn().execute(
+            "SELECT email, password, name, profile, profile_version FROM users WHERE email = ?", (email,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def exists(self, email):
+        return self._conn().execute("SELECT 1 FROM users WHERE email = ?", (email,)).fetchone() is not None
+
+    def create(self, email, password, name):
+        """
+        Returns False if the email is already registered.
+        """
+        try:
+            with self._conn() as conn:
+                conn.execute(
+                    "INSERT INTO users (email, password, name, profile) VALUES (?, ?, ?, '')",
+                    (email, password, name)
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def update_profile(self, email, profile):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE users SET profile = ?, profile_version = profile_version + 1 WHERE email = ?",
+                (profile, email)
+            )
+
+    def issue_token(self, email):
+        """
+        Returns the user's access token, creating it on first use. The token is
+        kept across logins so other signed-in clients stay valid.
+        """
+        with self._conn() as conn:
+            conn.execute("UPDATE users SET token = ? WHERE email = ? AND token IS NULL", (uuid.uuid4().hex, email))
+            row = conn.execute("SELECT token FROM users WHERE email = ?", (email,)).fetchone()
+        return row["token"] if row else None
+
+    def profile_by_token(self, token):
+        """
+        {"profile", "version"} of the user holding `token`, or None for an unknown token.
+        """
+        row = self._conn().execute(
+            "SELECT profile, profile_version FROM users WHERE token = ?", (token,)
+        ).fetchone()
+        return {"profile": row["profile"], "version": row["profile_version"]} if row else None
+
+    def iter_profiles(self, batch_size=1000):
+        """
+        Yields lists of {"email", "name", "profile"} for users with a taste profile,
+        `batch_size` rows at a time in email order (keyset pagination, no OFFSET scans).
+        """
+        last_email = ""
+        while True:
+            rows = self._conn().execute(
+                "SELECT email, name, profile FROM users WHERE profile != '' AND email > ? ORDER BY email LIMIT ?",
+                (last_email, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            yield [dict(row) for row in rows]
+            last_email = rows[-1]["email"]
+
+    def migrate_from_json(self, json_path=LEGACY_JSON):
+        """
+        One-shot import of the old users.json. Later runs are no-ops, and
+        existing rows are never overwritten. Returns the number of rows imported.
+        """
+        legacy = {}
+        if os.path.exists(json_path):
+            with open(json_path, "r") as f:
+                legacy = json.load(f)
+        # Claiming the marker and importing happen in one write transaction: with
+        # several workers starting at once, only the first one imports
+        conn = self._conn()
+        with conn:
+            claimed = conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('migrated_json', ?)", (json_path,)
+            ).rowcount
+            if not claimed:
+                return 0
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO users (email, password, name, profile) VALUES (?, ?, ?, ?)",
+                [(email, u["password"], u.get("name") or email.split("@")[0], u.get("profile") or "")
+                 for email, u in legacy.items()]
+            )
+        if legacy:
+            print(f"📦 Migrated {cursor.rowcount} users from {json_path} to {self.path}")
+        return cursor.rowcount
+
+    # --- ASYNC WRAPPERS (run on a worker thread) ---
+
+    async def aget(self, email):
+        return await asyncio.to_thread(self.get, email)
+
+    async def aexists(self, email):
+        return await asyncio.to_thread(self.exists, email)
+
+    async def acreate(self, email, password, name):
+        return await asyncio.to_thread(self.create, email, password, name)
+
+    async def aupdate_profile(self, email, profile):
+        await asyncio.to_thread(self.update_profile, email, profile)
+
+    async def aissue_token(self, email):
+        return await asyncio.to_thread(self.issue_token, email)
+
+    async def aprofile_by_token(self, token):
+        return await asyncio.to_thread(self.profile_by_token, token)